@@ -20,10 +20,16 @@ Tip: Hold 'Shift' and press 'S' for functions to position the curve.
 
 
 
-from Blender import *
-import math
-import bpy
+try:
+	from Blender import *
+	import bpy
+	inBlender = 1
+except ImportError:
+	inBlender = 0
 
+import math
+import time
+from collections import deque
 
 
 degrees1_TEXT = "0"
@@ -31,6 +37,8 @@ degrees2_TEXT = "90"
 radius1_TEXT = "1"
 radius2_TEXT = "1"
 cuts_TEXT = "8"
+tolerance_TEXT = "0.01"
+adaptive_TOG = 0
 
 create_HDL = 1
 degrees1_HDL = 2
@@ -39,6 +47,42 @@ radius1_HDL = 4
 radius2_HDL = 5
 cuts_HDL = 6
 change_HDL = 7
+tolerance_HDL = 8
+adaptive_HDL = 9
+
+# use numpy for curves with at least this many points,
+# it is imported when first needed since it is slow to import
+numpyMinPts = 64
+numpy = None
+numpyTried = 0
+
+# the object property the curve parameters are saved in
+curveKey = "circCurve"
+
+# how far an end point can move, times its radius,
+# before the saved curve parameters are not used
+curveEndTol = 0.000001
+
+# update the progress bar after this many curves
+progressStep = 100
+
+# the most points kept in the cache of generated curves,
+# curves are kept by their parameters and number of points,
+# curveCacheOrder has the keys in the order they were used with
+# the clock of each use, the uses that are not the last are skipped
+curveCacheMaxPts = 2000000
+curveCache = {}
+curveCacheOrder = deque()
+curveCachePts = 0
+curveCacheClock = 0
+
+# the most unit arc tables kept and the most points in a kept
+# table, with the number of times a table was found or had to be made
+unitArcMax = 256
+unitArcMaxPts = 10000
+unitArcs = {}
+unitArcHits = 0
+unitArcMisses = 0
 
 
 
@@ -220,16 +264,99 @@ def getCurveParameters(xPts, yPts):
 
 
 
-def createCurve(deg1, deg2, rad1, rad2, cuts):
+# import numpy if it has not been tried yet, returns true if it can be used
+def haveNumpy():
+	global numpy
+	global numpyTried
 	
-	if rad1 <= 0 or rad2 <= 0:
-		Draw.PupMenu("Radiuses must be greater than 0.")
-		#Draw.PupStrInput("Radiuses must be greater than 0.", "", 1)
-		return
+	if not numpyTried:
+		numpyTried = 1
+		try:
+			import numpy
+		except ImportError:
+			numpy = None
 	
-	if deg1 == deg2:
-		Draw.PupMenu("Degrees can not be equal.")
-		return
+	return numpy != None
+
+
+# get the table of a unit arc with a number of points turning a number of
+# degrees, each point's part of the way along it and the cos and sin of its
+# angle, along with the edges, the tables are shared by all curves using them
+def getUnitArc(pts, sweep):
+	global unitArcHits
+	global unitArcMisses
+	
+	key = (pts, sweep)
+	table = unitArcs.get(key)
+	if table != None:
+		unitArcHits += 1
+		return table
+	
+	unitArcMisses += 1
+	
+	edges = list(zip(range(0, pts-1), range(1, pts)))
+	
+	if pts >= numpyMinPts and haveNumpy():
+		t = numpy.arange(pts) / (pts-1.0)
+		ang = numpy.radians(sweep * t)
+		table = (t, numpy.cos(ang), numpy.sin(ang), edges)
+	else:
+		t = [i / (pts-1.0) for i in range(0, pts)]
+		ang = [math.radians(sweep * i) for i in t]
+		table = (t, [math.cos(a) for a in ang], [math.sin(a) for a in ang], edges)
+	
+	if pts <= unitArcMaxPts:
+		if len(unitArcs) >= unitArcMax:
+			unitArcs.clear()
+		unitArcs[key] = table
+	
+	return table
+
+
+# get the points and edges of a circular curve or spiral segment going
+# from degrees deg1 to deg2 and radius rad1 to rad2, each point is found
+# from its own angle and radius so the error doesn't build up along it,
+# a unit arc is turned to the first point's angle and scaled
+def getArcPts(deg1, deg2, rad1, rad2, pts):
+	
+	pts = int(pts)
+	if pts < 2:
+		return [], []
+	
+	t, cosAng, sinAng, edges = getUnitArc(pts, deg2 - deg1)
+	c = math.cos(math.radians(deg1))
+	s = math.sin(math.radians(deg1))
+	
+	if pts >= numpyMinPts and haveNumpy():
+		rad = rad1 * (1.0 - t) + rad2 * t
+		xPts = ((s * cosAng + c * sinAng) * rad).tolist()
+		yPts = ((c * cosAng - s * sinAng) * rad).tolist()
+		
+		return list(zip(xPts, yPts, [0.0] * pts)), edges
+	
+	verts = []
+	for i in range(0, pts):
+		rad = rad1 * (1.0 - t[i]) + rad2 * t[i]
+		
+		verts.append(((s * cosAng[i] + c * sinAng[i]) * rad, (c * cosAng[i] - s * sinAng[i]) * rad, 0.0))
+	
+	return verts, edges
+
+
+# get the number of points of a curve, with a tolerance the points are
+# spaced so no line is further than it from the curve where it bends
+# the least, else there are a number of cuts per 90 degrees
+def getCurvePtCnt(deg1, deg2, rad1, rad2, cuts, tol=0):
+	
+	if tol > 0:
+		# the radius of the bend at the largest radius,
+		# a spiral bends a little less than a circle does
+		rad = max(abs(rad1), abs(rad2))
+		radInc = (rad2 - rad1) / math.radians(abs(deg2 - deg1))
+		rad = (rad * rad + 2.0 * radInc * radInc) / math.sqrt(rad * rad + radInc * radInc)
+		
+		degInc = math.degrees(2.0 * math.acos(max(1.0 - float(tol) / rad, -1.0)))
+		return int(math.ceil(abs(deg2 - deg1) / degInc - 0.000001)) + 1.0
 	
 	#convert the number of cuts into points
 	rightAngleCnt = int(abs(deg2 - deg1) / 90.0)
@@ -237,37 +364,104 @@ def createCurve(deg1, deg2, rad1, rad2, cuts):
 	if rightAngleCnt == 0:
 		rightAngleCnt = 1
 	
-	pts = rightAngleCnt * (int(abs(cuts)) + 1.0) + 1.0
-	
-	
-	degInc = (deg2 - deg1) / (pts-1.0)
-	radInc = (rad2 - rad1) / (pts-1.0)
+	return rightAngleCnt * (int(abs(cuts)) + 1.0) + 1.0
 
-	c = math.cos(-degInc / 360.0 * math.pi * 2.0);
-	s = math.sin(-degInc / 360.0 * math.pi * 2.0);
 
-	vPrior = math.cos(deg1 / 360.0 * math.pi * 2.0);
-	hPrior = math.sin(deg1 / 360.0 * math.pi * 2.0);
+# save the parameters of a curve on its object, as strings
+# because floats in object properties are single precision
+def setCurveParameters(ob, rad1, deg1, rad2, deg2, cuts, tol=0):
+	ob.properties[curveKey] = {
+		'rad1': repr(float(rad1)), 'deg1': repr(float(deg1)),
+		'rad2': repr(float(rad2)), 'deg2': repr(float(deg2)),
+		'cuts': repr(float(cuts)), 'tol': repr(float(tol))}
 
-	y = vPrior*rad1;
-	x = hPrior*rad1;
 
-	verts = []
-	edges = []
-	verts.append((x, y, 0.0))
+# get the parameters saved on a curve's object, returns None if
+# there are none or the end points are not where they would be
+def getSavedCurveParameters(ob, cu):
+	
+	if curveKey not in ob.properties.keys():
+		return None
 	
-	for i in range(1, int(pts)):
+	params = ob.properties[curveKey]
+	try:
+		rad1 = float(params['rad1'])
+		deg1 = float(params['deg1'])
+		rad2 = float(params['rad2'])
+		deg2 = float(params['deg2'])
+	except (KeyError, ValueError):
+		return None
+	
+	for rad, deg, v in ((rad1, deg1, cu.verts[0]), (rad2, deg2, cu.verts[-1])):
+		x = math.sin(math.radians(deg)) * rad
+		y = math.cos(math.radians(deg)) * rad
+		if abs(v[0] - x) > curveEndTol * rad or abs(v[1] - y) > curveEndTol * rad:
+			return None
+	
+	return rad1, deg1, rad2, deg2
+
+
+# get the points and edges of a curve from the cache or make them,
+# the least recently used curves are dropped when the cache is full
+def getCachedArcPts(deg1, deg2, rad1, rad2, pts):
+	global curveCachePts
+	global curveCacheClock
+	global curveCacheOrder
+	
+	curveCacheClock += 1
+	key = (deg1, deg2, rad1, rad2, int(pts))
+	
+	entry = curveCache.get(key)
+	if entry != None:
+		entry[0] = curveCacheClock
+		curveCacheOrder.append((curveCacheClock, key))
+		
+		# drop the skipped uses when they are most of the order
+		if len(curveCacheOrder) > 2 * len(curveCache) + 64:
+			curveCacheOrder = deque(sorted([(e[0], k) for k, e in curveCache.items()]))
 		
-		v = hPrior * s + vPrior * c;
-		h = vPrior * -s + hPrior * c;
-		y = v*(rad1+radInc*i);
-		x = h*(rad1+radInc*i);
+		return entry[1], entry[2]
+	
+	verts, edges = getArcPts(deg1, deg2, rad1, rad2, pts)
+	if len(verts) > curveCacheMaxPts:
+		return verts, edges
+	
+	while curveCache and curveCachePts + len(verts) > curveCacheMaxPts:
+		clock, oldest = curveCacheOrder.popleft()
+		entry = curveCache.get(oldest)
+		if entry != None and entry[0] == clock:
+			del curveCache[oldest]
+			curveCachePts -= len(entry[1])
+	
+	curveCache[key] = [curveCacheClock, verts, edges]
+	curveCacheOrder.append((curveCacheClock, key))
+	curveCachePts += len(verts)
+	
+	return verts, edges
 
-		verts.append((x, y, 0.0))
-		edges.append((i-1, i))
 
-		vPrior = v;
-		hPrior = h;
+# replace the points and edges of a mesh in place,
+# a new mesh would leave the old one behind as an orphan
+def setMeshEdges(me, verts, edges):
+	me.verts = None
+	me.verts.extend(verts)
+	me.edges.extend(edges)
+	me.update()
+
+
+def createCurve(deg1, deg2, rad1, rad2, cuts, tol=0):
+	
+	if rad1 <= 0 or rad2 <= 0:
+		Draw.PupMenu("Radiuses must be greater than 0.")
+		#Draw.PupStrInput("Radiuses must be greater than 0.", "", 1)
+		return
+	
+	if deg1 == deg2:
+		Draw.PupMenu("Degrees can not be equal.")
+		return
+	
+	pts = getCurvePtCnt(deg1, deg2, rad1, rad2, cuts, tol)
+	verts, edges = getCachedArcPts(deg1, deg2, rad1, rad2, pts)
 	
 	
 	editmode = Window.EditMode()
@@ -281,6 +475,7 @@ def createCurve(deg1, deg2, rad1, rad2, cuts):
 	scn = bpy.data.scenes.active
 	ob = scn.objects.new(cu, 'curve')
 	ob.setLocation(Window.GetCursorPos())
+	setCurveParameters(ob, rad1, deg1, rad2, deg2, cuts, tol)
 
 	if editmode: Window.EditMode(1)
 	Window.RedrawAll()
@@ -288,95 +483,102 @@ def createCurve(deg1, deg2, rad1, rad2, cuts):
 	return
 
 
-def chgCurveRes(cuts):
+def chgCurveRes(cuts, tol=0):
 
 	scene = Scene.GetCurrent()
 	
-	# make sure the radiuses are greater than zero
+	obs = []
 	for ob in scene.objects.selected:
 		if ob.type == "Mesh":
-			cu = ob.data
-			if cu.verts[0][0] == 0 and cu.verts[0][1] == 0:
-				Draw.PupMenu("Error, "+ob.name+" x,y end point == 0,0")
-				return
-			if cu.verts[-1][0] == 0 and cu.verts[-1][1] == 0:
-				Draw.PupMenu("Error, "+ob.name+" x,y end point == 0,0")
-				return
+			obs.append(ob)
 	
-	for ob in scene.objects.selected:
-		if ob.type == "Mesh":
-			cu = ob.data
-			
+	# leave edit mode once so the meshes are up to date
+	editmode = Window.EditMode()
+	if editmode: Window.EditMode(0)
+	
+	# make sure the radiuses are greater than zero
+	for ob in obs:
+		cu = ob.data
+		if cu.verts[0][0] == 0 and cu.verts[0][1] == 0:
+			Draw.PupMenu("Error, "+ob.name+" x,y end point == 0,0")
+			if editmode: Window.EditMode(1)
+			return
+		if cu.verts[-1][0] == 0 and cu.verts[-1][1] == 0:
+			Draw.PupMenu("Error, "+ob.name+" x,y end point == 0,0")
+			if editmode: Window.EditMode(1)
+			return
+	
+	# find the new points of every curve before changing any of them
+	computeTime = time.time()
+	changes = []
+	oldVertCnt = 0
+	newVertCnt = 0
+	for n in range(0, len(obs)):
+		if n % progressStep == 0:
+			Window.DrawProgressBar(0.5 * n / len(obs), "Computing curves")
+		
+		ob = obs[n]
+		cu = ob.data
+		
+		# find the parameters from the points if they were not saved
+		params = getSavedCurveParameters(ob, cu)
+		if params == None:
 			xCurvePts = []
 			yCurvePts = []
 			for i in range(0, len(cu.verts)):
 				xCurvePts.append(cu.verts[i][0])
 				yCurvePts.append(cu.verts[i][1])
 			
-			print xCurvePts
-			
-			rad1, deg1, rad2, deg2 = getCurveParameters(xCurvePts, yCurvePts)
-			
-			if deg1 == deg2:
-				continue;
-			
-			
-			#convert the number of cuts into points
-			rightAngleCnt = int(abs(deg2 - deg1) / 90.0)
-			
-			if rightAngleCnt == 0:
-				rightAngleCnt = 1
-			
-			pts = rightAngleCnt * (int(abs(cuts)) + 1.0) + 1.0
-			
-			
-			degInc = (deg2 - deg1) / (pts-1.0)
-			radInc = (rad2 - rad1) / (pts-1.0)
+			params = getCurveParameters(xCurvePts, yCurvePts)
 		
-			c = math.cos(-degInc / 360.0 * math.pi * 2.0);
-			s = math.sin(-degInc / 360.0 * math.pi * 2.0);
+		rad1, deg1, rad2, deg2 = params
 		
-			vPrior = math.cos(deg1 / 360.0 * math.pi * 2.0);
-			hPrior = math.sin(deg1 / 360.0 * math.pi * 2.0);
-
-			y = vPrior*rad1;
-			x = hPrior*rad1;
+		if deg1 == deg2:
+			continue;
 		
-			verts = []
-			edges = []
-			verts.append((xCurvePts[0], yCurvePts[0], 0.0))
-			edges.append((0, 1))
-			
-			for i in range(1, int(pts-1)):
-				
-				v = hPrior * s + vPrior * c;
-				h = vPrior * -s + hPrior * c;
-				y = v*(rad1+radInc*i);
-				x = h*(rad1+radInc*i);
 		
-				verts.append((x, y, 0.0))
-				edges.append((i, i+1))
+		# the tolerance is kept in the scene's units
+		scale = max(abs(ob.size[0]), abs(ob.size[1]))
+		pts = getCurvePtCnt(deg1, deg2, rad1 * scale, rad2 * scale, cuts, tol)
 		
-				vPrior = v;
-				hPrior = h;
-			
-			verts.append((xCurvePts[-1], yCurvePts[-1], 0.0))
-			
-			
-			editmode = Window.EditMode()
-			if editmode: Window.EditMode(0)
+		# keep the end points where they are, the cached points
+		# are copied so they are not changed
+		verts, edges = getCachedArcPts(deg1, deg2, rad1, rad2, pts)
+		verts = list(verts)
+		verts[0] = (cu.verts[0][0], cu.verts[0][1], 0.0)
+		verts[-1] = (cu.verts[-1][0], cu.verts[-1][1], 0.0)
 		
-			cuChg = bpy.data.meshes.new('cuEdges') # create a new mesh
-			cuChg.verts.extend(verts)
-			cuChg.edges.extend(edges)
-			
-			# link mesh to object
-			ob.link(cuChg)
-			cu.update()
-			
-			if editmode: Window.EditMode(1)
-			Window.RedrawAll()
-			
+		changes.append((ob, verts, edges, params))
+		oldVertCnt += len(cu.verts)
+		newVertCnt += len(verts)
+	
+	computeTime = time.time() - computeTime
+	
+	# rewrite the meshes
+	updateTime = time.time()
+	for n in range(0, len(changes)):
+		if n % progressStep == 0:
+			Window.DrawProgressBar(0.5 + 0.5 * n / len(changes), "Changing meshes")
+		
+		ob, verts, edges, params = changes[n]
+		rad1, deg1, rad2, deg2 = params
+		
+		setMeshEdges(ob.data, verts, edges)
+		setCurveParameters(ob, rad1, deg1, rad2, deg2, cuts, tol)
+	
+	Window.DrawProgressBar(1.0, "")
+	
+	if editmode: Window.EditMode(1)
+	Window.RedrawAll()
+	
+	updateTime = time.time() - updateTime
+	print("Changed %d curves, %.3f seconds computing, %.3f seconds updating" % (len(changes), computeTime, updateTime))
+	print("Curve vertices: %d before, %d after" % (oldVertCnt, newVertCnt))
+	print("Unit arc tables: %d hits, %d misses" % (unitArcHits, unitArcMisses))
+	
+	if tol > 0:
+		Draw.PupMenu("Curve vertices%%t|%d before|%d after" % (oldVertCnt, newVertCnt))
+	
 	return
 
 
@@ -393,6 +595,7 @@ def textEdit_ev(evt, val):
 	global radius1_TEXT
 	global radius2_TEXT
 	global cuts_TEXT
+	global tolerance_TEXT
 	
 	if evt == degrees1_HDL:
 		degrees1_TEXT = val
@@ -409,6 +612,9 @@ def textEdit_ev(evt, val):
 	if evt == cuts_HDL:
 		cuts_TEXT = val
 
+	if evt == tolerance_HDL:
+		tolerance_TEXT = val
+
 # handle button events
 def button_event(evt):
 	global degrees1_TEXT
@@ -416,12 +622,27 @@ def button_event(evt):
 	global radius1_TEXT
 	global radius2_TEXT
 	global cuts_TEXT
+	global tolerance_TEXT
+	global adaptive_TOG
+	
+	if evt == adaptive_HDL:
+		adaptive_TOG = 1^adaptive_TOG
+		Draw.Redraw()
+		return
+	
+	# the tolerance is only used when it is turned on
+	tol = 0
+	if adaptive_TOG:
+		tol = float(tolerance_TEXT)
+		if tol <= 0:
+			Draw.PupMenu("The tolerance must be greater than 0.")
+			return
 	
 	if evt == create_HDL:
-		createCurve(float(degrees1_TEXT), float(degrees2_TEXT), float(radius1_TEXT), float(radius2_TEXT), float(cuts_TEXT))
+		createCurve(float(degrees1_TEXT), float(degrees2_TEXT), float(radius1_TEXT), float(radius2_TEXT), float(cuts_TEXT), tol)
 
 	if evt == change_HDL:
-		chgCurveRes(float(cuts_TEXT))
+		chgCurveRes(float(cuts_TEXT), tol)
 
 
 # draw to screen
@@ -431,6 +652,8 @@ def gui():
 	global radius1_TEXT
 	global radius2_TEXT
 	global cuts_TEXT
+	global tolerance_TEXT
+	global adaptive_TOG
 	
 	
 	BGL.glClearColor(0.72,0.7,0.7,1)
@@ -460,6 +683,10 @@ def gui():
 	ret = Draw.String("Cuts:", cuts_HDL, x, y, 76, 25, cuts_TEXT, 9, "The number of cuts per quadrant.", textEdit_ev)
 	Draw.Button("Change", change_HDL, x+80, y, 76, 25, "Change the resolution of a curve.")
 
+	y += 30
+	ret = Draw.String("Tol:", tolerance_HDL, x, y, 76, 25, tolerance_TEXT, 9, "The furthest a line can be from the curve.", textEdit_ev)
+	Draw.Toggle("Use Tol", adaptive_HDL, x+80, y, 76, 25, adaptive_TOG, "Use the tolerance instead of the cuts to create curves and change their resolution.")
+
 	y += 30
 	BGL.glRasterPos2i(x, y)
 	Draw.Text("Change resolution:")
@@ -483,5 +710,7 @@ def gui():
 	Draw.Text("Press 'Q' to exit.")
 
 
-# registering the 3 callbacks
-Draw.Register(gui, event, button_event)
\ No newline at end of file
+# registering the 3 callbacks, the curve functions can
+# be imported without Blender
+if inBlender:
+	Draw.Register(gui, event, button_event)
\ No newline at end of file
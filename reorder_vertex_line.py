@@ -10,7 +10,13 @@ Tip: 'Reorder vertex lines so they can be used as paths.'
 __bpydoc__ = """\
 This tool will make it easy to use vertex lines as paths by reording them end to end.
 
-All that is needed is a double indicating the beginning.
+All the selected mesh objects are reordered, or the active one if none are selected.
+
+A mesh can have many vertex lines and closed loops, each is reordered and the vertices of each one are kept together. The index of each one's first vertex is saved in the mesh's 'chainOffsets' property.
+
+A double can be used to indicate the beginning of a vertex line, otherwise it begins where chosen from the menu: at its end with the lowest index, at the end nearest the 3D cursor (and then each vertex line at the end nearest the last one's end), at its lowest end and then the leftmost, or at a vertex in the 'start' vertex group.
+
+Vertex lines that end in the same location are joined, so imported lines don't need to have their doubles removed first.
 
 Create a double at the beginning of a vertex line by going into "Edit Mode", right clicking a vertex, pressing 'E', and right clicking to let go of the vertex.
 
@@ -23,179 +29,751 @@ Tip: Doubles can be removed by pressing 'W' and clicking remove doubles in edit
 
 
 from Blender import *
-import bpy
+from sys import exc_info
+import os
+
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+
+
+#largest distance between two vertices in the same location, used to find
+#doubles and to join line ends that are in the same location
+doubleLimit = 0.000001
+
+#number of processes reordering the selected objects (0 uses all cores),
+#they are only used for at least parallelMinLines lines
+workers = 0
+parallelMinLines = 50000
+
+#most failed objects listed after reordering
+failedListMax = 20
+
+#where the paths without a double start, at the end with the lowest
+#index, the end nearest a point (the 3d cursor) and then the end nearest
+#the last path's end, the lowest end then the leftmost or a vertex in the
+#vertex group startGroupName (closed loops can start at any of their points)
+startLowestIndex = 0
+startNearest = 1
+startLowest = 2
+startGroup = 3
+startGroupName = "start"
+
+
+
+#put points into a spatial hash, a uniform grid of cells cellSize wide
+def buildPointGrid(ptsX, ptsY, ptsZ, ids, cellSize):
+	
+	cells = {}
+	cellMin = None
+	cellMax = None
+	for i in ids:
+		cell = (int(ptsX[i] // cellSize), int(ptsY[i] // cellSize), int(ptsZ[i] // cellSize))
+		if cell in cells:
+			cells[cell].append(i)
+		else:
+			cells[cell] = [i]
+	
+	#the range of the cells that are used
+	if cells:
+		cellMin = tuple([min([c[k] for c in cells]) for k in range(0, 3)])
+		cellMax = tuple([max([c[k] for c in cells]) for k in range(0, 3)])
+	
+	return {'cells': cells, 'size': cellSize, 'min': cellMin, 'max': cellMax, 'cnt': len(ids)}
+
+
+
+#remove a point from the grid
+def removeGridPt(grid, ptsX, ptsY, ptsZ, i):
+	
+	size = grid['size']
+	cell = (int(ptsX[i] // size), int(ptsY[i] // size), int(ptsZ[i] // size))
+	grid['cells'][cell].remove(i)
+	
+	if grid['cells'][cell] == []:
+		del grid['cells'][cell]
+	
+	grid['cnt'] -= 1
+
+
+
+#get a cell size for a grid with about one point in each cell
+def getGridCellSize(ptsX, ptsY, ptsZ, ids):
+	
+	if len(ids) == 0:
+		return 1.0
+	
+	spans = []
+	for pts in (ptsX, ptsY, ptsZ):
+		span = max([pts[i] for i in ids]) - min([pts[i] for i in ids])
+		if span > 0.0:
+			spans.append(span)
+	
+	if spans == []:
+		return 1.0
+	
+	volume = 1.0
+	for span in spans:
+		volume *= span
+	
+	#at most 1024 cells across
+	return max((volume / len(ids)) ** (1.0 / len(spans)), max(spans) / 1024.0)
+
+
+
+#find the grid points within limit of a point, only the cells
+#within limit of the point are looked at (usually just one)
+def findGridPts(grid, ptsX, ptsY, ptsZ, x, y, z, limit):
+	
+	size = grid['size']
+	cells = grid['cells']
+	xCells = range(int((x - limit) // size), int((x + limit) // size) + 1)
+	yCells = range(int((y - limit) // size), int((y + limit) // size) + 1)
+	zCells = range(int((z - limit) // size), int((z + limit) // size) + 1)
+	limit *= limit
+	
+	found = []
+	for i in xCells:
+		for j in yCells:
+			for k in zCells:
+				cell = cells.get((i, j, k))
+				if cell != None:
+					for n in cell:
+						dx = ptsX[n] - x
+						dy = ptsY[n] - y
+						dz = ptsZ[n] - z
+						if dx*dx + dy*dy + dz*dz <= limit:
+							found.append(n)
+	
+	return found
+
+
+
+#find the grid point nearest to a point, the cells are
+#searched in growing shells until no closer point can be in the next shell,
+#returns -1 if there are no points
+def findNearestGridPt(grid, ptsX, ptsY, ptsZ, x, y, z):
+	
+	size = grid['size']
+	cells = grid['cells']
+	if not cells:
+		return -1
+	
+	#points outside of the grid start from its closest cell
+	center = []
+	outside = 0.0
+	for v, lo, hi in zip((x, y, z), grid['min'], grid['max']):
+		c = int(v // size)
+		if c < lo:
+			outside += (v - lo * size) ** 2
+			c = lo
+		elif c > hi:
+			outside += (v - (hi + 1) * size) ** 2
+			c = hi
+		center.append(c)
+	
+	cx, cy, cz = center
+	(xLo, yLo, zLo), (xHi, yHi, zHi) = grid['min'], grid['max']
+	span = max(xHi - xLo, yHi - yLo, zHi - zLo)
+	
+	nearest = -1
+	nearestDist = 0.0
+	for r in range(0, span + 1):
+		
+		#the cells r cells away from the center that are in the grid,
+		#only the faces of the shell are listed
+		yAll = range(max(cy - r, yLo), min(cy + r, yHi) + 1)
+		zAll = range(max(cz - r, zLo), min(cz + r, zHi) + 1)
+		yMid = range(max(cy - r + 1, yLo), min(cy + r - 1, yHi) + 1)
+		yEnds = [j for j in set((cy - r, cy + r)) if yLo <= j <= yHi]
+		zEnds = [k for k in set((cz - r, cz + r)) if zLo <= k <= zHi]
+		
+		keys = []
+		for i in range(max(cx - r, xLo), min(cx + r, xHi) + 1):
+			if abs(i - cx) == r:
+				keys.extend([(i, j, k) for j in yAll for k in zAll])
+				continue
+			
+			keys.extend([(i, j, k) for j in yEnds for k in zAll])
+			if zEnds:
+				keys.extend([(i, j, k) for j in yMid for k in zEnds])
+		
+		for key in keys:
+			cell = cells.get(key)
+			if cell == None:
+				continue
+			
+			for n in cell:
+				dx = ptsX[n] - x
+				dy = ptsY[n] - y
+				dz = ptsZ[n] - z
+				dist = dx*dx + dy*dy + dz*dz
+				if nearest == -1 or dist < nearestDist:
+					nearest = n
+					nearestDist = dist
+		
+		if nearest != -1 and nearestDist <= outside + (r * size) ** 2:
+			break
+	
+	return nearest
 
 
 
-#find path head
-def findPathHead(ptsX, ptsY, ptsZ, linesA, linesB):
+#find the path heads, lines with no length (doubles)
+#that are connected to one other line
+def findPathHeads(ptsX, ptsY, ptsZ, linesA, linesB, lineStarts):
 	
-	#find which 2 connected points are in the same location
-	noLengthLines = []
+	#the points of a path head have 3 lines between them
+	pathHeads = []
+	limit = doubleLimit * doubleLimit
 	for i in range(0, len(linesA)):
-		if ptsX[linesA[i]] == ptsX[linesB[i]]:
-			noLengthLines.append(i)
-	
-	
-	#find the connection count for each of the "noLengthLines"
-	connectionCnts = [0] * len(noLengthLines)
-	for i in range(0, len(noLengthLines)):
-		for j in range(0, len(linesA)):
-			headLineA = linesA[noLengthLines[i]]
-			headLineB = linesB[noLengthLines[i]]
-			lineA = linesA[j]
-			lineB = linesB[j]
+		a = linesA[i]
+		b = linesB[i]
+		
+		if lineStarts[a+1] - lineStarts[a] + lineStarts[b+1] - lineStarts[b] == 3:
+			dx = ptsX[a] - ptsX[b]
+			dy = ptsY[a] - ptsY[b]
+			dz = ptsZ[a] - ptsZ[b]
 			
-			if (headLineA == lineA) or (headLineB == lineB) or (headLineA == lineB) or (headLineB == lineA):
-				
-				# don't count its self
-				if noLengthLines[i] != j:
-					connectionCnts[i] += 1;
+			if dx*dx + dy*dy + dz*dz <= limit:
+				pathHeads.append(i)
 	
+	return pathHeads
+
+
+
+#list the lines connected to each point, the lines of point i are
+#pointLines[lineStarts[i]:lineStarts[i+1]] (one flat list is much
+#faster to make than a list for every point)
+def getPointLines(ptsCnt, linesA, linesB):
 	
-	#find the path head
-	pathHeadCnt = 0
-	for i in range(0, len(noLengthLines)):
-		if connectionCnts[i] == 1:
-			pathHead = noLengthLines[i]
-			pathHeadCnt += 1
+	lineStarts = [0] * (ptsCnt + 1)
+	for i in linesA:
+		lineStarts[i+1] += 1
+	for i in linesB:
+		lineStarts[i+1] += 1
+	for i in range(0, ptsCnt):
+		lineStarts[i+1] += lineStarts[i]
 	
-	#if there is no path head then return -1
-	if pathHeadCnt == 0:
-		return -1
+	nextLine = lineStarts[:]
+	pointLines = [0] * lineStarts[ptsCnt]
+	for i in range(0, len(linesA)):
+		a = linesA[i]
+		b = linesB[i]
+		pointLines[nextLine[a]] = i
+		nextLine[a] += 1
+		pointLines[nextLine[b]] = i
+		nextLine[b] += 1
 	
-	return pathHead
+	return lineStarts, pointLines
 
 
 
-def reorderPathVerts(ptsX, ptsY, ptsZ, linesA, linesB, pathHead):
-	linesCnt = len(linesA)
-	roCnt = 0
+#join line ends that are in the same location but are different points
+#(and not the points of the same line), the points of path heads are left
+#alone, returns the new lines and the number of joined ends
+def weldLineEnds(ptsX, ptsY, ptsZ, linesA, linesB, lineStarts, pointLines, pathHeads):
+	
+	if doubleLimit <= 0.0:
+		return linesA, linesB, 0
+	
+	headPts = {}
+	for i in pathHeads:
+		headPts[linesA[i]] = 1
+		headPts[linesB[i]] = 1
+	
+	endPts = [i for i in range(0, len(ptsX)) if lineStarts[i+1] - lineStarts[i] == 1 and i not in headPts]
+	grid = buildPointGrid(ptsX, ptsY, ptsZ, endPts, doubleLimit)
+	
+	#the end each end is joined to
+	welds = {}
+	for i in endPts:
+		if i in welds:
+			continue
+		
+		line = pointLines[lineStarts[i]]
+		otherPt = linesA[line] + linesB[line] - i
+		
+		for j in findGridPts(grid, ptsX, ptsY, ptsZ, ptsX[i], ptsY[i], ptsZ[i], doubleLimit):
+			if j != i and j != otherPt and j not in welds:
+				welds[j] = i
+	
+	if welds:
+		linesA = [welds.get(i, i) for i in linesA]
+		linesB = [welds.get(i, i) for i in linesB]
+	
+	return linesA, linesB, len(welds)
+
+
+
+#find the groups of connected lines using union-find,
+#the groups are in the order of their first lines
+def findLineGroups(ptsCnt, linesA, linesB):
+	
+	parents = list(range(0, ptsCnt))
+	
+	#join the groups of the points of each line,
+	#halving the paths to the roots along the way
+	for i in range(0, len(linesA)):
+		a = linesA[i]
+		while parents[a] != a:
+			parents[a] = parents[parents[a]]
+			a = parents[a]
+		
+		b = linesB[i]
+		while parents[b] != b:
+			parents[b] = parents[parents[b]]
+			b = parents[b]
+		
+		if a != b:
+			parents[b] = a
+	
+	groups = []
+	groupIds = {}
+	for i in range(0, len(linesA)):
+		root = linesA[i]
+		while parents[root] != root:
+			parents[root] = parents[parents[root]]
+			root = parents[root]
+		
+		if root not in groupIds:
+			groupIds[root] = len(groups)
+			groups.append([])
+		groups[groupIds[root]].append(i)
+	
+	return groups
+
+
+
+#walk along unused lines starting at a point, each line is
+#turned so it starts at the point the line before it ends at
+def reorderPathVerts(lineStarts, pointLines, usedLines, lineCnts, linesA, linesB, startPt):
 	roLinesA = []
 	roLinesB = []
-	usedLines = [0] * linesCnt
-	loc = pathHead
-	
-	roLinesA.append(linesA[loc])
-	roLinesB.append(linesB[loc])
-	usedLines[loc] = 1
-	roCnt += 1
-	priorLoc = loc
-	loc += 1
-	foundConnection = 1
+	b = startPt
 	
-	#repeat until all possible connections are found
+	#repeat until no unused line is connected to the end of the path
+	foundConnection = 1
 	while (foundConnection):
 		
 		#reset
 		foundConnection = 0
 		
-		if loc == -1:
-			loc += 2
-		
-		#move location forwards and find connected lines
-		while loc < linesCnt:
+		for k in range(lineStarts[b], lineStarts[b+1]):
+			loc = pointLines[k]
 			if usedLines[loc] != 1:
-				if (linesA[loc] == linesA[priorLoc]) or (linesB[loc] == linesB[priorLoc]) or (linesA[loc] == linesB[priorLoc]) or (linesB[loc] == linesA[priorLoc]):
-					roLinesA.append(linesA[loc])
-					roLinesB.append(linesB[loc])
-					usedLines[loc] = 1
-					roCnt += 1
-					priorLoc = loc
-					foundConnection = 1
-			
-			loc += 1
+				if linesA[loc] == b:
+					a, b = b, linesB[loc]
+				else:
+					a, b = b, linesA[loc]
+				
+				roLinesA.append(a)
+				roLinesB.append(b)
+				usedLines[loc] = 1
+				lineCnts[a] -= 1
+				lineCnts[b] -= 1
+				foundConnection = 1
+				break
+	
+	return roLinesA, roLinesB
+
+
+
+#reorder every group of connected lines into paths, lines that end in
+#the same location are joined first, a path starts at the free point of
+#a path head, else where startMode says (startPt is the point to start
+#near, startPts holds the vertex group's points), returns the paths'
+#lines and if each is closed or starts at a path head
+def reorderPaths(ptsX, ptsY, ptsZ, linesA, linesB, startMode=startLowestIndex, startPt=(0.0, 0.0, 0.0), startPts=None):
+	linesCnt = len(linesA)
+	if startPts == None:
+		startPts = {}
+	
+	lineStarts, pointLines = getPointLines(len(ptsX), linesA, linesB)
+	pathHeads = findPathHeads(ptsX, ptsY, ptsZ, linesA, linesB, lineStarts)
+	
+	#join the lines that end in the same location
+	linesA, linesB, weldCnt = weldLineEnds(ptsX, ptsY, ptsZ, linesA, linesB, lineStarts, pointLines, pathHeads)
+	if weldCnt:
+		lineStarts, pointLines = getPointLines(len(ptsX), linesA, linesB)
+	
+	#the free point of each path head line
+	isHead = [0] * linesCnt
+	for i in pathHeads:
+		isHead[i] = 1
+	
+	usedLines = [0] * linesCnt
+	lineCnts = [lineStarts[i+1] - lineStarts[i] for i in range(0, len(ptsX))]
+	
+	paths = []
+	
+	def walkPath(pt, isHeadPt):
+		roLinesA, roLinesB = reorderPathVerts(lineStarts, pointLines, usedLines, lineCnts, linesA, linesB, pt)
+		closed = (not isHeadPt) and len(roLinesA) >= 3 and roLinesB[-1] == pt
+		paths.append((roLinesA, roLinesB, closed, isHeadPt))
+		return roLinesB[-1]
+	
+	def lowestKey(i):
+		return (ptsZ[i], ptsX[i], ptsY[i], i)
+	
+	#the points each group's paths start at in order, the last path head
+	#first like before, else its ends or any point of a closed loop
+	groupStarts = []
+	headPts = {}
+	for group in findLineGroups(len(ptsX), linesA, linesB):
 		
-		if loc == linesCnt:
-			loc -= 2
+		starts = []
+		for i in group:
+			if isHead[i]:
+				if lineCnts[linesA[i]] == 1:
+					starts.append(linesA[i])
+				else:
+					starts.append(linesB[i])
+		starts.reverse()
 		
-		#move location backwards and find connected lines
-		while loc >= 0:
-			if usedLines[loc] != 1:
-				if (linesA[loc] == linesA[priorLoc]) or (linesB[loc] == linesB[priorLoc]) or (linesA[loc] == linesB[priorLoc]) or (linesB[loc] == linesA[priorLoc]):
-					roLinesA.append(linesA[loc])
-					roLinesB.append(linesB[loc])
-					usedLines[loc] = 1
-					roCnt += 1
-					priorLoc = loc
-					foundConnection = 1
+		groupPts = sorted(set([linesA[i] for i in group] + [linesB[i] for i in group]))
+		endPts = [i for i in groupPts if lineCnts[i] % 2 == 1]
+		
+		isHeadPt = int(starts != [])
+		if isHeadPt:
+			for i in starts:
+				headPts[i] = 1
+		else:
+			if endPts:
+				starts = endPts
+			else:
+				starts = groupPts
 			
-			loc -= 1
+			if startMode == startGroup:
+				starts = [i for i in starts if i in startPts] or starts
+			elif startMode == startLowest:
+				starts = sorted(starts, key=lowestKey)
+		
+		groupStarts.append((starts, isHeadPt, endPts, groupPts))
 	
-	#switch line directions if going the wrong way
-	if (linesCnt >= 2):
-		if (roLinesA[0] == roLinesA[1]) or (roLinesA[0] == roLinesB[1]):
-			roLinesA[0], roLinesB[0] = roLinesB[0], roLinesA[0]
+	if startMode == startLowest:
+		groupStarts.sort(key=lambda g: lowestKey(g[0][0]))
 	
-	for i in range(1, roCnt):
-		if roLinesA[i] != roLinesB[i-1]:
-			roLinesA[i], roLinesB[i] = roLinesB[i], roLinesA[i]
+	#start each path at the start point nearest the end of the last path,
+	#used start points are taken out of the grid, which is made again
+	#when most of its points are used so there are few empty cells
+	if startMode == startNearest:
+		ids = [i for g in groupStarts for i in g[0]]
+		grid = buildPointGrid(ptsX, ptsY, ptsZ, ids, getGridCellSize(ptsX, ptsY, ptsZ, ids))
+		inGrid = dict.fromkeys(ids, 1)
+		x, y, z = startPt
+		
+		while grid['cnt'] > 0:
+			if grid['cnt'] * 2 < len(ids) and grid['cnt'] > 64:
+				ids = [i for cell in grid['cells'].values() for i in cell]
+				grid = buildPointGrid(ptsX, ptsY, ptsZ, ids, getGridCellSize(ptsX, ptsY, ptsZ, ids))
+			
+			i = findNearestGridPt(grid, ptsX, ptsY, ptsZ, x, y, z)
+			removeGridPt(grid, ptsX, ptsY, ptsZ, i)
+			del inGrid[i]
+			if lineCnts[i] == 0:
+				continue
+			
+			end = walkPath(i, i in headPts)
+			x, y, z = ptsX[end], ptsY[end], ptsZ[end]
+			
+			#the path's points with no lines left can't start a path
+			for pt in paths[-1][1]:
+				if pt in inGrid and lineCnts[pt] == 0:
+					removeGridPt(grid, ptsX, ptsY, ptsZ, pt)
+					del inGrid[pt]
 	
-	return roLinesA, roLinesB
+	#walk the lines that are left from each group's start points
+	for starts, isHeadPt, endPts, groupPts in groupStarts:
+		for pts, isHeadPt in ((starts, isHeadPt), (endPts, 0), (groupPts, 0)):
+			for pt in pts:
+				if lineCnts[pt] == 0:
+					continue
+				
+				walkPath(pt, isHeadPt)
+	
+	return paths
 
 
 
-def mainFunc():
-	
-	scene = Scene.GetCurrent()
-	ob = scene.objects.active
+#get the vertex coordinates and the lines of a mesh object
+def getMeshLines(ob):
+	me = ob.getData(mesh=1)
 	
-	if ob == None:
-		return
-
-	if ob.type != "Mesh":
-		return
-
 	xPts = []
 	yPts = []
 	zPts = []
-	for i in range(0, len(ob.data.verts)):
-		xPts.append(ob.data.verts[i][0])
-		yPts.append(ob.data.verts[i][1])
-		zPts.append(ob.data.verts[i][2])
-
+	for v in me.verts:
+		co = v.co
+		xPts.append(co[0])
+		yPts.append(co[1])
+		zPts.append(co[2])
+	
 	linesA = []
 	linesB = []
-	for edges in ob.getData().edges:
-		linesA.append(edges.v1.index)
-		linesB.append(edges.v2.index)
+	for edge in me.edges:
+		linesA.append(edge.v1.index)
+		linesB.append(edge.v2.index)
+	
+	return xPts, yPts, zPts, linesA, linesB
+
+
+
+#replace the vertices and lines of a mesh in place so no
+#orphan mesh is left behind and its users keep the same mesh
+def setMeshLines(me, verts, edges):
+	me.verts = None
+	me.verts.extend(verts)
+	me.edges.extend(edges)
+	me.update()
+
 
 
-	pathHead = findPathHead(xPts, yPts, zPts, linesA, linesB)
+#get the vertices in an object's start vertex group,
+#returns None if the object has no start vertex group
+def getStartGroupPts(ob):
+	me = ob.getData(mesh=1)
 	
+	if startGroupName not in me.getVertGroupNames():
+		return None
 	
-	if pathHead == -1:
-		Draw.PupMenu("Create double at beginning (Edit Mode: RMB, Press 'E', RMB)")
-		return
+	startPts = {}
+	for i in me.getVertsFromGroup(startGroupName):
+		startPts[i] = 1
+	
+	return startPts
 
 
-	roLinesA, roLinesB = reorderPathVerts(xPts, yPts, zPts, linesA, linesB, pathHead)
 
+#get the 3d cursor location in an object's local coordinates
+def getLocalCursor(ob):
+	
+	matrix = ob.matrixWorld.copy().invert()
+	cursor = Mathutils.Vector(Window.GetCursorPos()) * matrix
 	
+	return cursor[0], cursor[1], cursor[2]
+
+
+
+#reorder the lines of a mesh, returns an error message or None and the new
+#vertices, lines and the index of the first vertex of each path (chainOffsets)
+def reorderMesh(job):
+	xPts, yPts, zPts, linesA, linesB, startMode, startPt, startPts = job
+	
+	if len(linesA) == 0:
+		return "no edges", None
+	
+	try:
+		paths = reorderPaths(xPts, yPts, zPts, linesA, linesB, startMode, startPt, startPts)
+	except Exception:
+		return str(exc_info()[1]), None
+	
+	#each path's vertices are together, starting at the index in chainOffsets,
+	#the double of a path head is left out and a closed loop ends with a line
+	#from its last vertex to its first
 	verts = []
 	edges = []
-	edgesCnt = len(roLinesA)
+	chainOffsets = []
 	
-	for i in range(0, edgesCnt):
-		verts.append((xPts[roLinesB[i]], yPts[roLinesB[i]], zPts[roLinesB[i]]))
+	for roLinesA, roLinesB, closed, isHeadPt in paths:
+		if isHeadPt:
+			pathPts = roLinesB
+		elif closed:
+			pathPts = [roLinesA[0]] + roLinesB[:-1]
+		else:
+			pathPts = [roLinesA[0]] + roLinesB
+		
+		first = len(verts)
+		chainOffsets.append(first)
+		
+		for i in pathPts:
+			verts.append((xPts[i], yPts[i], zPts[i]))
+		
+		for i in range(first + 1, len(verts)):
+			edges.append((i-1, i))
+		
+		if closed:
+			edges.append((len(verts)-1, first))
+	
+	return None, (verts, edges, chainOffsets)
+
+
+
+#worker process function, reorders every step-th job from first and sends
+#the results back, the process is started with fork so the jobs and this
+#function are not pickled (Blender runs scripts with exec, so it can't be
+#found by name in a new process)
+def sendReorderedMeshes(jobs, first, step, conn):
+	for i in range(first, len(jobs), step):
+		conn.send(reorderMesh(jobs[i]))
+	conn.close()
 
-	for i in range(1, edgesCnt):
-		edges.append((i-1, i))
 
 
+#reorder the lines of many meshes in order, using worker processes
+#when there are enough lines and workers to share them
+def reorderMeshes(jobs):
+	
+	workerCnt = workers
+	if workerCnt <= 0 and multiprocessing != None:
+		workerCnt = multiprocessing.cpu_count()
+	
+	linesCnt = 0
+	for job in jobs:
+		linesCnt += len(job[3])
+	
+	#the workers need fork to inherit the jobs
+	if workerCnt < 2 or len(jobs) < 2 or linesCnt < parallelMinLines or \
+	   multiprocessing == None or not hasattr(os, 'fork'):
+		return [reorderMesh(job) for job in jobs]
+	
+	workerCnt = min(workerCnt, len(jobs))
+	if hasattr(multiprocessing, 'get_context'):
+		mp = multiprocessing.get_context('fork')
+	else:
+		mp = multiprocessing
+	
+	#worker w reorders jobs w, w + workerCnt, ... and sends the results
+	#through its own pipe, the parent's copy of the sending end is closed
+	#so a worker that stops is noticed, its meshes are reordered here
+	procs = []
+	conns = []
+	results = []
+	try:
+		try:
+			for w in range(0, workerCnt):
+				recvConn, sendConn = mp.Pipe(False)
+				conns.append(recvConn)
+				try:
+					proc = mp.Process(target=sendReorderedMeshes, args=(jobs, w, workerCnt, sendConn))
+					proc.daemon = True
+					proc.start()
+					procs.append(proc)
+				finally:
+					sendConn.close()
+		except (OSError, IOError):
+			for proc in procs:
+				proc.terminate()
+			for conn in conns:
+				conn.close()
+			conns = [None] * workerCnt
+		
+		for i in range(0, len(jobs)):
+			conn = conns[i % workerCnt]
+			result = None
+			if conn != None:
+				try:
+					result = conn.recv()
+				except (EOFError, IOError):
+					conn.close()
+					conns[i % workerCnt] = None
+			
+			if result == None:
+				result = reorderMesh(jobs[i])
+			results.append(result)
+	finally:
+		for proc in procs:
+			if proc.is_alive():
+				proc.terminate()
+			proc.join()
+		for conn in conns:
+			if conn != None:
+				conn.close()
+	
+	return results
+
+
+
+#reorder the lines of mesh objects, returns the objects that failed and why
+def reorderObjects(obs, startMode):
+	
+	failed = []
+	jobs = []
+	jobObs = []
+	for ob in obs:
+		startPt = (0.0, 0.0, 0.0)
+		startPts = {}
+		
+		if startMode == startNearest:
+			startPt = getLocalCursor(ob)
+		
+		if startMode == startGroup:
+			startPts = getStartGroupPts(ob)
+			if startPts == None:
+				failed.append("%s: no '%s' vertex group" % (ob.name, startGroupName))
+				continue
+		
+		jobs.append(getMeshLines(ob) + (startMode, startPt, startPts))
+		jobObs.append(ob)
+	
+	results = reorderMeshes(jobs)
+	
+	
+	for ob, result in zip(jobObs, results):
+		error, mesh = result
+		if error != None:
+			failed.append("%s: %s" % (ob.name, error))
+			continue
+		
+		verts, edges, chainOffsets = mesh
+		
+		me = ob.getData(mesh=1)
+		setMeshLines(me, verts, edges)
+		me.properties['chainOffsets'] = chainOffsets
+	
+	return failed
+
+
+
+#reorder the selected mesh objects, or the active one if none are selected
+def mainFunc():
+	
+	scene = Scene.GetCurrent()
+	
+	obs = []
+	for ob in scene.objects.selected:
+		if ob.type == "Mesh":
+			obs.append(ob)
+	
+	if obs == []:
+		ob = scene.objects.active
+		
+		if ob == None:
+			return
+		
+		if ob.type != "Mesh":
+			return
+		
+		obs.append(ob)
+	
+	
+	#where to start the paths that don't start at a double
+	startMode = Draw.PupMenu("Start paths without a double at%t|The end with the lowest index|The end nearest the 3D cursor, then the last path's end|The lowest end, then the leftmost|A vertex in the '" + startGroupName + "' vertex group")
+	if startMode < 1:
+		return
+	startMode -= 1
+	
+	
+	#leave edit mode once so the meshes are up to date, and go back
+	#to it even if reordering fails
 	editmode = Window.EditMode()
 	if editmode: Window.EditMode(0)
 	
-	roChg = bpy.data.meshes.new('roEdges') # create a new mesh
-	roChg.verts.extend(verts)
-	roChg.edges.extend(edges)
+	try:
+		failed = reorderObjects(obs, startMode)
+	finally:
+		if editmode: Window.EditMode(1)
+	Window.RedrawAll()
 	
-	# link mesh to object
-	ob.link(roChg)
-	ob.data.update()
 	
-	if editmode: Window.EditMode(1)
-	Window.RedrawAll()
+	#list the objects that were not reordered
+	if failed:
+		failedCnt = len(failed)
+		if failedCnt > failedListMax:
+			failed = failed[:failedListMax] + ["... and %d more" % (failedCnt - failedListMax)]
+		Draw.PupMenu("Not reordered (%d of %d objects)%%t|%s" % (failedCnt, len(obs), '|'.join(failed)))
 
 
 mainFunc()
\ No newline at end of file
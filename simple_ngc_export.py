@@ -13,204 +13,2184 @@ __bpydoc__ = """\
 	It might be a good idea to use "reorder_vertex_line.py" before exporting.
 
 	Use "reorder_vertex_line.py" to untangle the vertex sequence and give a starting point.
+
+	A new path is started wherever an edge doesn't start at the vertex the
+	edge before it ends at, so each path of a reordered mesh is cut apart.
+
+	Without Blender this runs from the command line and exports mesh
+	dumps (.obj, .json or .npz), use --help for the options.
 """
 
 
-from Blender import *
-import math
+# inside Blender 'sys' is replaced by Blender.sys
+import sys
+
+try:
+	from Blender import *
+	inBlender = 1
+except ImportError:
+	inBlender = 0
+
+from array import array
+import math
+import gzip
+import hashlib
+import itertools
+import json
+import optparse
+import os
+import re
+import time
+
+try:
+	import multiprocessing
+except ImportError:
+	multiprocessing = None
+
+
+relCoord_TOG = 0
+setZero_TOG = 0
+addG0_TOG = 1
+gzip_TOG = 0
+modal_TOG = 0
+simplify_TOG = 0
+arcs_TOG = 0
+order_TOG = 0
+reverse_TOG = 1
+cache_TOG = 0
+reorder_TOG = 0
+repeats_MENU = 1
+feedRate_TEXT = "120"
+precision_TEXT = "6"
+workers_TEXT = "0"
+simplifyTol_TEXT = "0.001"
+arcTol_TEXT = "0.001"
+
+
+exit_HDL = 1
+chooseDir_HDL = 2
+blendDir_HDL = 3
+feedRate_HDL = 4
+addG0_HDL = 5
+setZero_HDL = 6
+relCoord_HDL = 7
+precision_HDL = 8
+gzip_HDL = 9
+modal_HDL = 10
+simplify_HDL = 11
+simplifyTol_HDL = 12
+arcs_HDL = 13
+arcTol_HDL = 14
+order_HDL = 15
+reverse_HDL = 16
+workers_HDL = 17
+cache_HDL = 18
+reorder_HDL = 19
+repeats_HDL = 20
+
+# use numpy for objects with at least this many points,
+# it is imported when first needed since it is slow to import
+numpyMinPts = 64
+numpy = None
+numpyTried = 0
+
+# fewest segments that can be joined into an arc
+arcMinSegs = 4
+
+# nearest endpoints looked at, most paths reversed or moved over
+# by one 2-opt or or-opt move and most improvement passes when ordering paths
+orderNeighbors = 6
+orderMaxSegment = 1000
+orderPasses = 4
+
+# grid cell keys are x * gridKeyMul + y, at most gridMaxCells
+# cells across, smaller cells are used until there are at most
+# gridCellPts points in each cell that has points
+gridKeyMul = 1<<21
+gridMaxCells = 1<<20
+gridCellPts = 8
+
+# only use worker processes for at least this many points
+parallelMinPts = 100000
+
+# the block cache directory is made next to the g-code file, the least
+# recently used blocks are removed when it gets larger than cacheMaxSize,
+# change cacheVersion when the block format changes, a block file is a
+# json line with the version, start, end, motion word and seconds it
+# took to generate, then the body text
+cacheDirName = "ngc_cache"
+cacheMaxSize = 64<<20
+cacheVersion = "2"
+
+# the options a path block depends on
+cacheOpts = ('precision', 'relCoord', 'modal', 'simplify', 'simplifyTol', 'arcs', 'arcTol')
+
+# points formatted with one string operation
+formatChunkPts = 4096
+
+# paths with more points than this are exported in chunks of this many
+# points so the memory used does not grow with the path, these paths
+# do not use the block cache or worker processes
+streamChunkPts = 1<<18
+
+# the processor seconds spent in each export stage and the number of
+# path points, only kept when the stats are on, stageTotal is the time
+# of all the stages so each stage's time doesn't include the ones it calls
+stageNames = ('reorder', 'extract', 'transform', 'fit', 'format', 'write')
+stageTimes = None
+stageTotal = 0.0
+
+# size of the file buffer and of each write
+writeChunkSize = 1<<20
+
+# how copies of a path that only differ by their location are written,
+# each in full, once as an o-word subroutine that each copy calls, or
+# as the same relative moves repeated for controllers without subroutines
+repeatsNone = 0
+repeatsSub = 1
+repeatsInline = 2
+
+# the number of the first subroutine
+subFirstNum = 100
+
+# trailing zeros (and decimal point) of numbers followed by white space
+trailZerosRe = re.compile(r'\.?0+(?=\s)')
+
+# the processor time used, to find the time the cache saves
+if hasattr(time, 'process_time'):
+	cpuTime = time.process_time
+else:
+	cpuTime = time.clock
+
+# the file is written in binary mode
+if str is bytes:
+	toBytes = str
+else:
+	def toBytes(text):
+		return text.encode('latin-1')
+
+
+# import numpy if it has not been tried yet, returns true if it can be used
+def haveNumpy():
+	global numpy
+	global numpyTried
+	
+	if not numpyTried:
+		numpyTried = 1
+		try:
+			import numpy
+		except ImportError:
+			numpy = None
+	
+	return numpy != None
+
+
+# build the object matrix, object size is applied first,
+# then the x, y and z axis rotations and then the object location
+def getTransMatrix(size, rot, loc):
+	
+	cx = math.cos(rot[0])
+	sx = math.sin(rot[0])
+	cy = math.cos(rot[1])
+	sy = math.sin(rot[1])
+	cz = math.cos(rot[2])
+	sz = math.sin(rot[2])
+	
+	# rotation rows (z * y * x)
+	r0 = (cz*cy, cz*sy*sx - sz*cx, cz*sy*cx + sz*sx)
+	r1 = (sz*cy, sz*sy*sx + cz*cx, sz*sy*cx - cz*sx)
+	r2 = (-sy, cy*sx, cy*cx)
+	
+	matrix = []
+	for row, l in ((r0, loc[0]), (r1, loc[1]), (r2, loc[2])):
+		matrix.append([row[0]*size[0], row[1]*size[1], row[2]*size[2], l])
+	matrix.append([0.0, 0.0, 0.0, 1.0])
+	
+	return matrix
+
+
+# transform all the points of an object at once
+def transformPts(xPts, yPts, zPts, matrix):
+	
+	if len(xPts) >= numpyMinPts and haveNumpy():
+		m = numpy.array(matrix)
+		pts = numpy.dot(m[:3, :3], numpy.array([xPts, yPts, zPts], dtype=float))
+		pts += m[:3, 3:4]
+		return pts[0].tolist(), pts[1].tolist(), pts[2].tolist()
+	
+	(m00, m01, m02, m03), (m10, m11, m12, m13), (m20, m21, m22, m23) = matrix[:3]
+	pts = list(zip(xPts, yPts, zPts))
+	
+	xPts = [m00*x + m01*y + m02*z + m03 for x, y, z in pts]
+	yPts = [m10*x + m11*y + m12*z + m13 for x, y, z in pts]
+	zPts = [m20*x + m21*y + m22*z + m23 for x, y, z in pts]
+	
+	return xPts, yPts, zPts
+
+
+# pull the vertex coordinates and the edge index pairs
+# of a mesh object into flat buffers
+def getMeshBuffers(ob):
+	
+	me = ob.getData(mesh=1)
+	
+	coords = array('d')
+	for v in me.verts:
+		coords.extend(v.co)
+	
+	edges = array('i')
+	for edge in me.edges:
+		edges.append(edge.v1.index)
+		edges.append(edge.v2.index)
+	
+	return coords, edges
+
+
+# the exporter only works on these records, any object with
+# name, size, rot, loc, layers and mesh data (verts and edges) can be used,
+# if lazy is true the mesh data is read by loadMeshRecord when it is needed
+def getMeshRecord(ob, lazy=0):
+	
+	record = {'name': ob.name, 'size': tuple(ob.size), 'rot': tuple(ob.rot),
+	          'loc': tuple(ob.loc), 'layers': ob.Layer}
+	
+	if lazy:
+		record['ob'] = ob
+	else:
+		record['coords'], record['edges'] = getMeshBuffers(ob)
+	
+	return record
+
+
+# read the mesh data of a lazy record, returns a record with its mesh data
+def loadMeshRecord(record):
+	
+	if 'coords' in record:
+		return record
+	
+	t = cpuTime()
+	loaded = dict(record)
+	loaded['coords'], loaded['edges'] = getMeshBuffers(loaded.pop('ob'))
+	
+	if stageTimes != None:
+		stageTimes['extract'] += cpuTime() - t
+	
+	return loaded
+
+
+# make a mesh record from lists of vertices and edge index pairs
+def makeMeshRecord(name, verts, edges, size=(1.0, 1.0, 1.0), rot=(0.0, 0.0, 0.0),
+                   loc=(0.0, 0.0, 0.0), layers=1):
+	
+	coords = array('d')
+	for v in verts:
+		if len(v) != 3:
+			raise ValueError("%s: vertex %d does not have 3 coordinates" % (name, len(coords) // 3))
+		coords.extend([float(c) for c in v])
+	
+	edgeIds = array('i')
+	for edge in edges:
+		edgeIds.append(int(edge[0]))
+		edgeIds.append(int(edge[1]))
+	
+	if len(edgeIds) > 0 and (min(edgeIds) < 0 or max(edgeIds) >= len(coords) // 3):
+		raise ValueError("%s: edge vertex index out of range" % (name))
+	
+	return {'name': name, 'coords': coords, 'edges': edgeIds,
+	        'size': tuple([float(v) for v in size]), 'rot': tuple([float(v) for v in rot]),
+	        'loc': tuple([float(v) for v in loc]), 'layers': int(layers)}
+
+
+# get the range of edges used by a record's path, a record split from a
+# mesh uses the edges in its run and a mesh record uses all of its edges
+def getPathRun(record):
+	
+	return record.get('run', (0, len(record['edges']) // 2))
+
+
+# get the number of points of a record's path, the first vertex
+# of the first edge and the second vertex of every edge
+def getPathPtCnt(record):
+	
+	a, b = getPathRun(record)
+	return b - a + 1
+
+
+# get the local coordinates of the points of a record's path in order
+def getPathCoords(record):
+	
+	coords = record['coords']
+	edges = record['edges']
+	a, b = getPathRun(record)
+	
+	pathCoords = array('d')
+	for i in [edges[a*2]] + list(edges[a*2+1:b*2:2]):
+		pathCoords.extend(coords[i*3:i*3+3])
+	
+	return pathCoords
+
+
+# add a record's path to a hash, the buffers of a mesh
+# record or the points of a record split from a mesh
+def hashPath(key, record):
+	
+	if 'run' in record:
+		key.update(toBytes("run"))
+		key.update(getPathCoords(record))
+	else:
+		key.update(record['coords'])
+		key.update(toBytes("edges"))
+		key.update(record['edges'])
+
+
+# split a mesh record into a record for each run of edges that follow each
+# other (an edge's first vertex is the second vertex of the edge before), so
+# the paths reorder_vertex_line.py writes into one mesh are exported apart,
+# a mesh with one run is yielded as it is
+def genRecordRuns(record):
+	
+	edges = record['edges']
+	lineCnt = len(edges) // 2
+	
+	starts = [0]
+	for k in range(1, lineCnt):
+		if edges[k*2] != edges[k*2-1]:
+			starts.append(k)
+	
+	if len(starts) == 1:
+		yield record
+		return
+	
+	starts.append(lineCnt)
+	for a, b in zip(starts, starts[1:]):
+		runRecord = dict(record)
+		runRecord['run'] = (a, b)
+		yield runRecord
+
+
+# split the edges of a mesh record into paths that follow connected
+# edges, paths start at the lowest end point left and then closed loops
+# at their lowest point, the walked edges are written in order to one
+# new edge buffer and a record with the run of each path is yielded,
+# so the paths share the mesh's coordinates
+def genRecordPaths(record):
+	
+	coords = record['coords']
+	edges = record['edges']
+	ptCnt = len(coords) // 3
+	lineCnt = len(edges) // 2
+	
+	# the lines of each point, the lines of point i are
+	# pointLines[lineStarts[i]:lineStarts[i+1]]
+	lineCnts = array('i', [0]) * ptCnt
+	for i in edges:
+		lineCnts[i] += 1
+	
+	lineStarts = array('i', [0]) * (ptCnt + 1)
+	for i in range(0, ptCnt):
+		lineStarts[i+1] = lineStarts[i] + lineCnts[i]
+	
+	fill = array('i', lineStarts)
+	pointLines = array('i', [0]) * len(edges)
+	for n in range(0, len(edges)):
+		i = edges[n]
+		pointLines[fill[i]] = n // 2
+		fill[i] += 1
+	fill = None
+	
+	# the next line to look at for each point
+	nextLine = array('i', lineStarts)
+	used = bytearray(lineCnt)
+	
+	# the walked edges, from the point before to the point after
+	pathEdges = array('i', [0]) * len(edges)
+	n = 0
+	
+	# the odd ends first and then every point, the
+	# count stops at the last point
+	ends = [i for i in range(0, ptCnt) if lineCnts[i] % 2 == 1]
+	for start in itertools.chain(ends, itertools.count()):
+		if start == ptCnt:
+			break
+		
+		while lineCnts[start] > 0:
+			first = n
+			pt = start
+			while 1:
+				k = nextLine[pt]
+				while k < lineStarts[pt+1] and used[pointLines[k]]:
+					k += 1
+				nextLine[pt] = k
+				
+				if k == lineStarts[pt+1]:
+					break
+				
+				line = pointLines[k]
+				used[line] = 1
+				a = edges[line*2]
+				b = edges[line*2+1]
+				lineCnts[a] -= 1
+				lineCnts[b] -= 1
+				
+				pathEdges[n*2] = pt
+				if a == pt:
+					pt = b
+				else:
+					pt = a
+				pathEdges[n*2+1] = pt
+				n += 1
+			
+			pathRecord = dict(record)
+			pathRecord['edges'] = pathEdges
+			pathRecord['run'] = (first, n)
+			yield pathRecord
+
+
+# yield the points of a record's path in chunks of at most chunkPts points,
+# walked backwards if the record is reversed, each chunk after the first
+# starts with the last point of the chunk before it
+def genPathChunks(record, chunkPts):
+	
+	coords = record['coords']
+	edges = record['edges']
+	ptCnt = getPathPtCnt(record)
+	first = getPathRun(record)[0] * 2
+	chunkPts = max(2, chunkPts)
+	
+	for a in range(0, ptCnt - 1, chunkPts - 1):
+		b = min(a + chunkPts, ptCnt)
+		if record.get('reverse'):
+			a, b = ptCnt - b, ptCnt - a
+		
+		# the first vertex of the first edge, then the second vertices
+		if a == 0:
+			pathPts = [edges[first]]
+			pathPts.extend(edges[first+1:first+b*2-2:2])
+		else:
+			pathPts = edges[first+a*2-1:first+b*2-2:2]
+		
+		if record.get('reverse'):
+			pathPts = pathPts[::-1]
+		
+		xPts = [coords[i*3] for i in pathPts]
+		yPts = [coords[i*3+1] for i in pathPts]
+		zPts = [coords[i*3+2] for i in pathPts]
+		
+		yield xPts, yPts, zPts
+
+
+# transform the points of each chunk
+def genTransformedChunks(chunks, matrix):
+	
+	for xPts, yPts, zPts in chunks:
+		yield transformPts(xPts, yPts, zPts, matrix)
+
+
+# fit arcs and simplify each chunk if true, a chunk is fitted on its own
+# so no arc crosses the end of a chunk and the chunk ends are kept
+def genFittedChunks(chunks, opts):
+	
+	for xPts, yPts, zPts in chunks:
+		yield fitPath(xPts, yPts, zPts, opts)
+
+
+# format the body of a path from its fitted chunks, state holds the
+# motion word the body leaves set and the path's last point
+def genPathText(chunks, opts, state):
+	
+	for xPts, yPts, zPts, arcs in chunks:
+		for text in formatPathBody(xPts, yPts, zPts, opts, arcs, state):
+			yield text
+		state['end'] = (xPts[-1], yPts[-1], zPts[-1])
+
+
+# time the chunks of a stage if the stats are on, the time
+# spent in the stages it gets its chunks from is not counted
+def timeStage(name, chunks):
+	
+	if stageTimes == None:
+		return chunks
+	
+	return genTimedChunks(name, chunks)
+
+
+# yield the chunks of a stage, adding up the time spent getting them
+def genTimedChunks(name, chunks):
+	global stageTotal
+	
+	while 1:
+		total = stageTotal
+		t = cpuTime()
+		try:
+			chunk = next(chunks)
+		except StopIteration:
+			chunk = None
+		t = cpuTime() - t
+		
+		stageTimes[name] += t - (stageTotal - total)
+		stageTotal = total + t
+		
+		if chunk == None:
+			return
+		
+		if name == 'extract':
+			stageTimes['points'] += len(chunk[0])
+		
+		yield chunk
+
+
+# the stages a path goes through before it is formatted,
+# yields the fitted chunks of at most chunkPts points
+def genPathStages(record, opts, chunkPts):
+	
+	matrix = getTransMatrix(record['size'], record['rot'], record['loc'])
+	
+	chunks = timeStage('extract', genPathChunks(record, chunkPts))
+	chunks = timeStage('transform', genTransformedChunks(chunks, matrix))
+	chunks = timeStage('fit', genFittedChunks(chunks, opts))
+	
+	return chunks
+
+
+# find the point farthest from the line between points a and b,
+# returns its index and squared distance
+def getFarthestPt(xPts, yPts, zPts, npPts, a, b):
+	
+	ax, ay, az = xPts[a], yPts[a], zPts[a]
+	dx, dy, dz = xPts[b] - ax, yPts[b] - ay, zPts[b] - az
+	lineLen = dx*dx + dy*dy + dz*dz
+	
+	if npPts != None and b - a > numpyMinPts:
+		px = npPts[0][a+1:b] - ax
+		py = npPts[1][a+1:b] - ay
+		pz = npPts[2][a+1:b] - az
+		
+		if lineLen > 0.0:
+			t = numpy.clip((px*dx + py*dy + pz*dz) / lineLen, 0.0, 1.0)
+			px -= t*dx
+			py -= t*dy
+			pz -= t*dz
+		
+		dists = px*px + py*py + pz*pz
+		i = int(dists.argmax())
+		return a + 1 + i, float(dists[i])
+	
+	farthest = a
+	farthestDist = -1.0
+	for i in range(a + 1, b):
+		px, py, pz = xPts[i] - ax, yPts[i] - ay, zPts[i] - az
+		
+		if lineLen > 0.0:
+			t = (px*dx + py*dy + pz*dz) / lineLen
+			if t < 0.0:
+				t = 0.0
+			elif t > 1.0:
+				t = 1.0
+			px, py, pz = px - t*dx, py - t*dy, pz - t*dz
+		
+		dist = px*px + py*py + pz*pz
+		if dist > farthestDist:
+			farthest = i
+			farthestDist = dist
+	
+	return farthest, farthestDist
+
+
+# get numpy arrays of the points if numpy can be used
+def getNumpyPts(xPts, yPts, zPts):
+	
+	if len(xPts) > numpyMinPts and haveNumpy():
+		return (numpy.array(xPts), numpy.array(yPts), numpy.array(zPts))
+	
+	return None
+
+
+# mark the points between first and last that are needed to keep the
+# path within the chord tolerance (Douglas-Peucker using a stack)
+def markSimplified(xPts, yPts, zPts, npPts, first, last, tol, keep):
+	
+	tol *= tol
+	keep[first] = 1
+	keep[last] = 1
+	
+	stack = [(first, last)]
+	while stack:
+		a, b = stack.pop()
+		if b - a < 2:
+			continue
+		
+		i, dist = getFarthestPt(xPts, yPts, zPts, npPts, a, b)
+		if dist > tol:
+			keep[i] = 1
+			stack.append((a, i))
+			stack.append((i, b))
+
+
+# remove the points that are within the chord tolerance
+def simplifyPts(xPts, yPts, zPts, tol):
+	
+	if len(xPts) < 3 or tol <= 0.0:
+		return xPts, yPts, zPts
+	
+	keep = [0] * len(xPts)
+	npPts = getNumpyPts(xPts, yPts, zPts)
+	markSimplified(xPts, yPts, zPts, npPts, 0, len(xPts) - 1, tol, keep)
+	
+	xPts = [v for v, k in zip(xPts, keep) if k]
+	yPts = [v for v, k in zip(yPts, keep) if k]
+	zPts = [v for v, k in zip(zPts, keep) if k]
+	
+	return xPts, yPts, zPts
+
+
+# check if the points from a to b are on a circular arc in the xy plane,
+# returns the center, 'G2' or 'G3', the radius and the swept radians
+def fitArc(xPts, yPts, zPts, a, b, tol):
+	
+	m = (a + b) // 2
+	ax, ay = xPts[a], yPts[a]
+	ux, uy = xPts[b] - ax, yPts[b] - ay
+	vx, vy = xPts[m] - ax, yPts[m] - ay
+	
+	# find the circle through the first, middle and last points
+	d = 2.0 * (ux*vy - uy*vx)
+	uu = ux*ux + uy*uy
+	vv = vx*vx + vy*vy
+	if abs(d) <= 1e-12 * (uu + vv):
+		return None
+	
+	cx = ax + (vy*uu - uy*vv) / d
+	cy = ay + (ux*vv - vx*uu) / d
+	rad = math.hypot(ax - cx, ay - cy)
+	
+	# every segment must turn the same way, stay on the circle
+	# and be short enough to be within the tolerance of the arc
+	maxStep = 2.0 * math.acos(max(-1.0, 1.0 - tol / rad))
+	z = zPts[a]
+	hPrior, vPrior = ax - cx, ay - cy
+	sweep = 0.0
+	for i in range(a + 1, b + 1):
+		h, v = xPts[i] - cx, yPts[i] - cy
+		
+		if abs(math.hypot(h, v) - rad) > tol or abs(zPts[i] - z) > tol:
+			return None
+		
+		step = math.atan2(hPrior*v - vPrior*h, hPrior*h + vPrior*v)
+		if abs(step) > maxStep or step * sweep < 0.0:
+			return None
+		
+		sweep += step
+		hPrior, vPrior = h, v
+	
+	if abs(sweep) >= math.pi * 2.0 - 1e-6:
+		return None
+	
+	if sweep > 0.0:
+		return cx, cy, "G3", rad, sweep
+	
+	return cx, cy, "G2", rad, sweep
+
+
+# find runs of points that can be written as single arcs, each run is
+# grown by doubling and then a binary search for its last point
+def findArcs(xPts, yPts, zPts, tol, minChord):
+	
+	arcs = []
+	n = len(xPts)
+	
+	a = 0
+	while a + arcMinSegs < n:
+		arc = fitArc(xPts, yPts, zPts, a, a + arcMinSegs, tol)
+		if arc == None:
+			a += 1
+			continue
+		
+		good = a + arcMinSegs
+		bad = n
+		step = arcMinSegs
+		while good < n - 1:
+			b = min(good + step, n - 1)
+			fit = fitArc(xPts, yPts, zPts, a, b, tol)
+			if fit == None:
+				bad = b
+				break
+			good, arc = b, fit
+			step *= 2
+		
+		while bad - good > 1:
+			b = (good + bad) // 2
+			fit = fitArc(xPts, yPts, zPts, a, b, tol)
+			if fit == None:
+				bad = b
+			else:
+				good, arc = b, fit
+		
+		cx, cy, code, rad, sweep = arc
+		chord = math.hypot(xPts[good] - xPts[a], yPts[good] - yPts[a])
+		
+		# leave nearly straight runs for the line code
+		if abs(sweep) < math.pi and rad * (1.0 - math.cos(sweep / 2.0)) <= tol:
+			a = good
+			continue
+		
+		if chord >= minChord:
+			arcs.append((a, good, cx, cy, code))
+		
+		a = good
+	
+	return arcs
+
+
+# fit arcs and simplify the path if true, returns the kept points and
+# the arcs (i, j, 'G2' or 'G3') keyed by the index of their end point
+def fitPath(xPts, yPts, zPts, opts):
+	
+	arcs = []
+	if (opts['arcs']):
+		minChord = 10.0 ** -opts['precision'] * 10.0
+		arcs = findArcs(xPts, yPts, zPts, opts['arcTol'], minChord)
+	
+	if arcs == [] and not (opts['simplify']):
+		return xPts, yPts, zPts, {}
+	
+	npPts = None
+	if (opts['simplify']):
+		npPts = getNumpyPts(xPts, yPts, zPts)
+	
+	# mark the points of the lines between the arcs
+	keep = [0] * len(xPts)
+	spans = []
+	first = 0
+	for arc in arcs:
+		spans.append((first, arc[0]))
+		first = arc[1]
+	spans.append((first, len(xPts) - 1))
+	
+	for first, last in spans:
+		if (opts['simplify']):
+			markSimplified(xPts, yPts, zPts, npPts, first, last, opts['simplifyTol'], keep)
+		else:
+			for i in range(first, last + 1):
+				keep[i] = 1
+	
+	# the new index of every kept point
+	newIndex = []
+	cnt = 0
+	for k in keep:
+		newIndex.append(cnt)
+		cnt += k
+	
+	arcEnds = {}
+	for a, b, cx, cy, code in arcs:
+		arcEnds[newIndex[b]] = (cx - xPts[a], cy - yPts[a], code)
+	
+	xPts = [v for v, k in zip(xPts, keep) if k]
+	yPts = [v for v, k in zip(yPts, keep) if k]
+	zPts = [v for v, k in zip(zPts, keep) if k]
+	
+	return xPts, yPts, zPts, arcEnds
+
+
+# get the world position of the first and last point of a path
+def getPathEnds(record):
+	
+	coords = record['coords']
+	edges = record['edges']
+	a, b = getPathRun(record)
+	first, last = edges[a*2], edges[b*2-1]
+	
+	xPts = [coords[first*3], coords[last*3]]
+	yPts = [coords[first*3+1], coords[last*3+1]]
+	zPts = [coords[first*3+2], coords[last*3+2]]
+	
+	matrix = getTransMatrix(record['size'], record['rot'], record['loc'])
+	xPts, yPts, zPts = transformPts(xPts, yPts, zPts, matrix)
+	
+	return (xPts[0], yPts[0], zPts[0]), (xPts[1], yPts[1], zPts[1])
+
+
+# put points into a uniform grid of cells (in xy)
+# so the nearest points can be found quickly
+def buildGrid(pts, ids):
+	
+	xMin = min([pts[i][0] for i in ids])
+	yMin = min([pts[i][1] for i in ids])
+	xMax = max([pts[i][0] for i in ids])
+	yMax = max([pts[i][1] for i in ids])
+	
+	# about two points per cell, found from the axes that have a span
+	spans = [span for span in (xMax - xMin, yMax - yMin) if span > 0.0]
+	size = 1.0
+	if spans:
+		area = 1.0
+		for span in spans:
+			area *= span
+		size = (area / (len(ids) / 2.0 + 1.0)) ** (1.0 / len(spans))
+	minSize = max(max(xMax - xMin, yMax - yMin) / gridMaxCells, 1e-9)
+	size = max(size, minSize)
+	
+	while 1:
+		cells = {}
+		for i in ids:
+			cell = int((pts[i][0] - xMin) / size) * gridKeyMul + int((pts[i][1] - yMin) / size)
+			if cell in cells:
+				cells[cell].append(i)
+			else:
+				cells[cell] = [i]
+		
+		# clustered points leave most of the cells empty, so
+		# make the cells smaller until the used ones are not crowded
+		ptsPerCell = len(ids) / float(len(cells))
+		if not spans or ptsPerCell <= gridCellPts or size <= minSize:
+			break
+		size = max(size * (2.0 / ptsPerCell) ** (1.0 / len(spans)), minSize)
+	
+	return {'cells': cells, 'xMin': xMin, 'yMin': yMin, 'xMax': xMax, 'yMax': yMax, 'size': size,
+	        'cnt': len(ids), 'xCells': int((xMax - xMin) / size), 'yCells': int((yMax - yMin) / size)}
+
+
+# remove a point from the grid
+def removeGridPt(grid, pts, i):
+	
+	size = grid['size']
+	cell = int((pts[i][0] - grid['xMin']) / size) * gridKeyMul + int((pts[i][1] - grid['yMin']) / size)
+	grid['cells'][cell].remove(i)
+	
+	if grid['cells'][cell] == []:
+		del grid['cells'][cell]
+	
+	grid['cnt'] -= 1
+
+
+# find the k nearest grid points to pt, the cells are searched in
+# growing rings (only the cells inside the grid) until no closer point
+# can be in the next ring, when more cells have been looked at than there
+# are points left all of the points are looked at instead
+def findNearest(grid, pts, pt, k):
+	
+	size = grid['size']
+	cells = grid['cells']
+	x, y, z = pt
+	
+	# points outside of the grid start from its closest cell
+	gx = min(max(x, grid['xMin']), grid['xMax'])
+	gy = min(max(y, grid['yMin']), grid['yMax'])
+	outside = (x - gx)**2 + (y - gy)**2
+	cx = int((gx - grid['xMin']) / size)
+	cy = int((gy - grid['yMin']) / size)
+	xHi = grid['xCells']
+	yHi = grid['yCells']
+	
+	found = []
+	visited = 0
+	for r in range(0, max(cx, xHi - cx, cy, yHi - cy) + 1):
+		
+		# the cells r cells away from the center that are in the grid
+		yAll = range(max(cy - r, 0), min(cy + r, yHi) + 1)
+		yEnds = [j for j in set((cy - r, cy + r)) if 0 <= j <= yHi]
+		
+		for i in range(max(cx - r, 0), min(cx + r, xHi) + 1):
+			if abs(i - cx) == r:
+				rows = yAll
+			else:
+				rows = yEnds
+			visited += len(rows)
+			
+			for j in rows:
+				cell = cells.get(i * gridKeyMul + j)
+				if cell != None:
+					for n in cell:
+						p = pts[n]
+						dx, dy, dz = p[0] - x, p[1] - y, p[2] - z
+						found.append((dx*dx + dy*dy + dz*dz, n))
+		
+		if len(found) >= k:
+			found.sort()
+			del found[k:]
+			if found[-1][0] <= outside + (r * size)**2:
+				break
+		
+		if visited > grid['cnt']:
+			found = []
+			for cell in cells.values():
+				for n in cell:
+					p = pts[n]
+					dx, dy, dz = p[0] - x, p[1] - y, p[2] - z
+					found.append((dx*dx + dy*dy + dz*dz, n))
+			break
+	
+	found.sort()
+	return found[:k]
+
+
+# distance between two points
+def getDist(a, b):
+	
+	return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2 + (a[2]-b[2])**2)
+
+
+# order the paths to shorten the rapid moves between them, a nearest
+# neighbour tour (from 0,0,0) is improved with 2-opt and or-opt moves,
+# returns the path order and which paths should be reversed
+def findPathOrder(ends, reverse):
+	
+	pathCnt = len(ends)
+	origin = (0.0, 0.0, 0.0)
+	
+	# endpoint 2*i is the start of path i and 2*i+1 its end
+	pts = []
+	for start, end in ends:
+		pts.append(start)
+		pts.append(end)
+	
+	if reverse:
+		ids = list(range(0, pathCnt * 2))
+	else:
+		ids = list(range(0, pathCnt * 2, 2))
+	
+	# nearest neighbour tour
+	grid = buildGrid(pts, ids)
+	seq = []
+	orient = []
+	pt = origin
+	for n in range(0, pathCnt):
+		# rebuild the grid when most of its points are used
+		if grid['cnt'] * 2 < len(ids) and grid['cnt'] > 64:
+			ids = [i for cell in grid['cells'].values() for i in cell]
+			grid = buildGrid(pts, ids)
+		
+		i = findNearest(grid, pts, pt, 1)[0][1]
+		seq.append(i // 2)
+		orient.append(i % 2)
+		
+		removeGridPt(grid, pts, i)
+		if reverse:
+			removeGridPt(grid, pts, i ^ 1)
+		
+		pt = pts[i ^ 1]
+	
+	if orderPasses == 0:
+		return seq, orient
+	
+	# the nearest endpoints of every endpoint
+	ids = list(range(0, pathCnt * 2))
+	grid = buildGrid(pts, ids)
+	near = []
+	for i in ids:
+		near.append([n[1] for n in findNearest(grid, pts, pts[i], orderNeighbors + 2) if n[1] // 2 != i // 2])
+	
+	pos = [0] * pathCnt
+	for p in range(0, pathCnt):
+		pos[seq[p]] = p
+	
+	def headId(p):
+		return seq[p]*2 + orient[p]
+	
+	def tailId(p):
+		return seq[p]*2 + 1 - orient[p]
+	
+	def tail(p):
+		if p < 0:
+			return origin
+		return pts[seq[p]*2 + 1 - orient[p]]
+	
+	def gap(p):
+		# rapid distance from path p to path p+1
+		if p + 1 >= pathCnt:
+			return 0.0
+		return getDist(tail(p), pts[headId(p + 1)])
+	
+	for n in range(0, orderPasses):
+		improved = 0
+		
+		# 2-opt, reverse the paths from a+1 to j so the tail
+		# of path a connects to the old tail of path j
+		for a in range(0, pathCnt - 1):
+			if not reverse:
+				break
+			
+			for c in near[tailId(a)]:
+				j = pos[c // 2]
+				if j <= a or j - a > orderMaxSegment or c != tailId(j):
+					continue
+				
+				old = gap(a) + gap(j)
+				new = getDist(tail(a), pts[c])
+				if j + 1 < pathCnt:
+					new += getDist(pts[headId(a + 1)], pts[headId(j + 1)])
+				
+				if new < old - 1e-9:
+					seq[a+1:j+1] = seq[a+1:j+1][::-1]
+					orient[a+1:j+1] = [1 - o for o in orient[a+1:j+1][::-1]]
+					for p in range(a + 1, j + 1):
+						pos[seq[p]] = p
+					improved = 1
+					break
+		
+		# or-opt, move one path next to a path it has a near endpoint to
+		for k in range(0, pathCnt):
+			removeGain = gap(k - 1) + gap(k)
+			if k + 1 < pathCnt:
+				removeGain -= getDist(tail(k - 1), pts[headId(k + 1)])
+			
+			cands = [(c, 1) for c in near[headId(k)]] + [(c, 0) for c in near[tailId(k)]]
+			for c, fromHead in cands:
+				p = pos[c // 2]
+				
+				# the path goes between b and b+1, flipped if its
+				# head is near a head or its tail is near a tail
+				toHead = (c == headId(p))
+				if toHead:
+					b = p - 1
+				else:
+					b = p
+				flip = (fromHead == toHead)
+				
+				if (flip and not reverse) or b == k or b == k - 1 or abs(b - k) > orderMaxSegment:
+					continue
+				
+				h = headId(k) ^ flip
+				t = h ^ 1
+				cost = getDist(tail(b), pts[h])
+				if b + 1 < pathCnt:
+					cost += getDist(pts[t], pts[headId(b + 1)]) - gap(b)
+				
+				if cost < removeGain - 1e-9:
+					path = seq.pop(k)
+					o = orient.pop(k)
+					if b > k:
+						b -= 1
+					seq.insert(b + 1, path)
+					orient.insert(b + 1, o ^ flip)
+					for p in range(min(k, b + 1), max(k, b + 1) + 1):
+						pos[seq[p]] = p
+					improved = 1
+					break
+		
+		if not improved:
+			break
+	
+	return seq, orient
+
+
+# order the mesh records by the part of their names after the last '-',
+# then by the rapid distance between them if true
+def orderPaths(records, opts):
+	
+	records = [r for r in records if len(r['edges']) > 0]
+	records.sort(key=lambda r: r['name'].split('-')[-1])
+	
+	if not (opts['order']) or len(records) < 2:
+		return records
+	
+	ends = [getPathEnds(r) for r in records]
+	seq, orient = findPathOrder(ends, opts['reverse'])
+	
+	ordered = []
+	for i, o in zip(seq, orient):
+		record = records[i]
+		if o:
+			record = dict(record)
+			record['reverse'] = 1
+		ordered.append(record)
+	
+	return ordered
+
+
+# get the layer mask of a list of layer numbers (1 to 20)
+def getLayersMask(layers):
+	
+	# add up the layers after converting to binary
+	mask = 0
+	for aL in layers:
+		mask |= 1<<(aL-1)
+	
+	return mask
+
+
+# export mesh records to a g-code file, only the records in the layers
+# of layersMask are used if it is given, this does not need Blender,
+# returns the name of the written file or None if there were no meshes
+def exportRecords(records, file_name, opts, layersMask=None):
+	
+	if layersMask != None:
+		records = [r for r in records if r.get('layers', 1) & layersMask]
+	
+	# return if found no meshes
+	if records == []:
+		print("No meshes found.")
+		return None
+	
+	if opts['gzip'] and not file_name.lower().endswith('.gz'):
+		file_name += '.gz'
+	
+	cache = None
+	if (opts['cache']):
+		cache = openBlockCache(os.path.join(os.path.dirname(os.path.abspath(file_name)), cacheDirName))
+	
+	if opts.get('stats'):
+		startStageTimes()
+	
+	writeGcode(records, file_name, opts, cache)
+	
+	if cache != None:
+		closeBlockCache(cache)
+		print("Export cache: %d hits, %d misses, %.2f seconds saved" % (cache['hits'], cache['misses'], cache['saved']))
+	
+	if opts.get('stats'):
+		printStageTimes()
+	
+	return file_name
+
+
+# start keeping the time spent in each export stage
+def startStageTimes():
+	global stageTimes
+	global stageTotal
+	
+	stageTimes = {'points': 0}
+	for name in stageNames:
+		stageTimes[name] = 0.0
+	stageTotal = 0.0
+
+
+# print the time spent in each export stage and the points it handled each
+# second, paths generated by worker processes are not counted
+def printStageTimes():
+	global stageTimes
+	
+	pts = stageTimes['points']
+	print("Export stages: %d path points" % (pts))
+	for name in stageNames:
+		t = stageTimes[name]
+		if t >= 0.001:
+			print("  %-10s %8.3f seconds %12.0f points/second" % (name, t, pts / t))
+		else:
+			print("  %-10s %8.3f seconds" % (name, t))
+	
+	stageTimes = None
+
+
+# script main function
+def ExportToGcode(file_name):
+	
+	selectedLayersMask = getLayersMask(Window.ViewLayers())
+	
+	# get a list of meshes, the meshes in the other
+	# layers are skipped here so they are not read
+	scene = Scene.GetCurrent()
+	meshes = []
+	for ob in scene.objects:
+		if selectedLayersMask & ob.Layer: # use only meshes in selected layers
+			obtype = ob.type
+			if obtype == "Mesh":
+				meshes.append(ob)
+	
+	# return if found no meshes
+	if meshes == []:
+		print("No meshes found.")
+		return
+
+	# change to object mode
+	in_editmode = Window.EditMode()
+	if in_editmode: Window.EditMode(0)
+	
+	# the meshes are read as they are exported
+	records = []
+	for mesh in meshes:
+		records.append(getMeshRecord(mesh, 1))
+	
+	exportRecords(records, file_name, getExportOptions(), selectedLayersMask)
+
+
+# get the export options from the gui settings
+def getExportOptions():
+	
+	return {'feedRate': float(feedRate_TEXT), 'relCoord': relCoord_TOG,
+	        'setZero': setZero_TOG, 'addG0': addG0_TOG,
+	        'precision': max(0, min(12, int(precision_TEXT))), 'gzip': gzip_TOG,
+	        'modal': modal_TOG, 'simplify': simplify_TOG,
+	        'simplifyTol': float(simplifyTol_TEXT), 'arcs': arcs_TOG,
+	        'arcTol': float(arcTol_TEXT), 'order': order_TOG, 'reverse': reverse_TOG,
+	        'workers': int(workers_TEXT), 'cache': cache_TOG,
+	        'reorder': reorder_TOG, 'chunkPts': streamChunkPts, 'stats': 0,
+	        'repeats': repeats_MENU - 1}
+
 
+# format numbers as word values for modal compaction,
+# rounded to the output precision without trailing zeros
+def fmtWordVals(vals, precision):
+	
+	text = (("%%.%df " % (precision)) * len(vals)) % tuple(vals)
+	
+	if precision > 0:
+		text = trailZerosRe.sub('', text)
+	
+	vals = text.split()
+	for i in range(0, len(vals)):
+		if vals[i] == '-0':
+			vals[i] = '0'
+	
+	return vals
 
-relCoord_TOG = 0
-setZero_TOG = 0
-addG0_TOG = 1
-feedRate_TEXT = "120"
+
+# format a line with only the words that change the modal state,
+# relative axis words are only needed when they are not zero,
+# the motion word is always written if force is true
+def formatModalLine(motion, words, modal, opts, force=0):
+	
+	vals = fmtWordVals([w[1] for w in words], opts['precision'])
+	
+	line = []
+	for i in range(0, len(words)):
+		letter = words[i][0]
+		
+		if (opts['relCoord']) and letter in "XYZ":
+			if vals[i] == '0':
+				continue
+		elif modal.get(letter) == vals[i]:
+			continue
+		
+		modal[letter] = vals[i]
+		line.append(letter + vals[i])
+	
+	if line or force:
+		if modal.get('G') != motion:
+			modal['G'] = motion
+			line.insert(0, motion)
+	
+	if line == []:
+		return ""
+	
+	return ' '.join(line) + "\n"
 
 
-exit_HDL = 1
-chooseDir_HDL = 2
-blendDir_HDL = 3
-feedRate_HDL = 4
-addG0_HDL = 5
-setZero_HDL = 6
-relCoord_HDL = 7
+# format the positioning code and the first 'G1' line of a path,
+# prior is the last tool position used to find relative coordinates,
+# modal holds the last written words when using modal compaction
+def formatPathHead(name, x, y, z, prior, opts, modal):
+	
+	f = "%%.%df" % (opts['precision'])
+	lines = ["( %s )\n" % (name)]
+	
+	# find relative coordinates if true
+	if (opts['relCoord']):
+		x, y, z = x - prior[0], y - prior[1], z - prior[2]
+	
+	# write positioning code if true
+	if (opts['addG0']):
+		if (opts['modal']):
+			lines.append(formatModalLine("G0", [('X', x)], modal, opts))
+			lines.append(formatModalLine("G0", [('Y', y)], modal, opts))
+			lines.append(formatModalLine("G0", [('Z', z)], modal, opts))
+		else:
+			lines.append(("G0 X"+f+"\n") % (x))
+			lines.append(("G0 Y"+f+"\n") % (y))
+			lines.append(("G0 Z"+f+"\n") % (z))
+		
+		# the tool is already at the start of the path
+		if (opts['relCoord']):
+			x, y, z = 0.0, 0.0, 0.0
+	
+	if (opts['modal']):
+		words = [('F', opts['feedRate']), ('X', x), ('Y', y), ('Z', z)]
+		lines.append(formatModalLine("G1", words, modal, opts, 1))
+	else:
+		lines.append(("G1 F%s X%s Y%s Z%s\n" % (f, f, f, f)) % (opts['feedRate'], x, y, z))
+	
+	return ''.join(lines)
 
 
-# rotate point using degrees
-def degRot(horiP, vertP, degrees):
+# format the rest of the path points as 'G1' lines and the arcs as
+# 'G2' or 'G3' lines, runs of lines are formatted with one string operation
+def formatPathBody(xPts, yPts, zPts, opts, arcs={}, state=None):
+	
+	f = "%%.%df" % (opts['precision'])
+	lineFmt = "G1 X%s Y%s Z%s\n" % (f, f, f)
+	arcFmt = "%%s X%s Y%s Z%s I%s J%s\n" % (f, f, f, f, f)
+	
+	# the words written by the path head or the chunk before, the
+	# modal motion word left set is kept in state if it is given
+	motion = "G1"
+	if state != None:
+		motion = state.get('motion', "G1")
+	if (opts['relCoord']):
+		lastX, lastY, lastZ = '0', '0', '0'
+	else:
+		lastX, lastY, lastZ = fmtWordVals([xPts[0], yPts[0], zPts[0]], opts['precision'])
+	
+	# find relative coordinates if true
+	if (opts['relCoord']):
+		xPts = [b - a for a, b in zip(xPts, xPts[1:])]
+		yPts = [b - a for a, b in zip(yPts, yPts[1:])]
+		zPts = [b - a for a, b in zip(zPts, zPts[1:])]
+	else:
+		xPts = xPts[1:]
+		yPts = yPts[1:]
+		zPts = zPts[1:]
+	
+	# the lines before each arc, point i is at index i-1 now
+	runEnds = sorted(arcs.keys())
+	runEnds.append(len(xPts) + 1)
+	
+	start = 1
+	for end in runEnds:
+		for i in range(start - 1, end - 1, formatChunkPts):
+			n = min(formatChunkPts, end - 1 - i)
+			
+			pts = [0.0] * (n * 3)
+			pts[0::3] = xPts[i:i+n]
+			pts[1::3] = yPts[i:i+n]
+			pts[2::3] = zPts[i:i+n]
+			
+			if not (opts['modal']):
+				yield (lineFmt * n) % tuple(pts)
+				continue
+			
+			# modal compaction, only the words that change are written
+			vals = fmtWordVals(pts, opts['precision'])
+			
+			lines = []
+			for k in range(0, n * 3, 3):
+				line = []
+				if vals[k] != lastX:
+					line.append('X' + vals[k])
+				if vals[k+1] != lastY:
+					line.append('Y' + vals[k+1])
+				if vals[k+2] != lastZ:
+					line.append('Z' + vals[k+2])
+				
+				if line:
+					if motion != "G1":
+						motion = "G1"
+						line.insert(0, motion)
+					
+					lines.append(' '.join(line))
+					if not (opts['relCoord']):
+						lastX, lastY, lastZ = vals[k], vals[k+1], vals[k+2]
+			
+			if lines:
+				yield '\n'.join(lines) + "\n"
+		
+		if end > len(xPts):
+			break
+		
+		# write the arc ending at this point
+		i, j, code = arcs[end]
+		x, y, z = xPts[end-1], yPts[end-1], zPts[end-1]
+		
+		if not (opts['modal']):
+			yield arcFmt % (code, x, y, z, i, j)
+		else:
+			vals = fmtWordVals([x, y, z, i, j], opts['precision'])
+			
+			line = []
+			for letter, val, last in zip("XYZ", vals, (lastX, lastY, lastZ)):
+				if val != last:
+					line.append(letter + val)
+			line.append('I' + vals[3])
+			line.append('J' + vals[4])
+			
+			if motion != code:
+				motion = code
+				line.insert(0, motion)
+			
+			if not (opts['relCoord']):
+				lastX, lastY, lastZ = vals[:3]
+			
+			yield ' '.join(line) + "\n"
+		
+		start = end + 1
+	
+	if state != None:
+		state['motion'] = motion
 
-	hUc = math.cos(degrees * (math.pi * 2.0 / 360.0))
-	vUc = math.sin(degrees * (math.pi * 2.0 / 360.0))
 
-	hLine1 = hUc
-	vLine1 = vUc
-	hLine2 = -vUc
-	vLine2 = hUc
+# transform, fit and format the body of a path, this is all of
+# a path's g-code that does not depend on the paths before it,
+# returns its first and last points, last motion word and the body
+def genPathBlock(record, opts):
+	
+	# the whole path is one chunk, its points are transformed at once
+	chunk = next(genPathStages(record, opts, getPathPtCnt(record)))
+	xPts, yPts, zPts, arcs = chunk
+	
+	state = {'motion': "G1"}
+	body = ''.join(timeStage('format', genPathText(iter([chunk]), opts, state)))
+	
+	return (xPts[0], yPts[0], zPts[0]), state['end'], state['motion'], body
 
-	h = vertP * hLine2 + horiP * vLine2
-	v = horiP * vLine1 + vertP * hLine1
-	horiP = h
-	vertP = v
 
-	return (horiP, vertP)
+# get the key of a path's shape, a hash of the path, size,
+# rotation and path direction, the paths with the same key are
+# copies that only differ by their location
+def getShapeKey(record):
+	
+	key = hashlib.md5()
+	key.update(toBytes(repr((record['size'], record['rot'], bool(record.get('reverse'))))))
+	hashPath(key, record)
+	
+	return key.hexdigest()
 
 
-def applyTrans(x, y, z, meshData):
+# find the shapes used by more than one path that are not streamed,
+# returns the shape key of every path and a dict of the repeated shapes
+def findRepeatedShapes(records, opts):
+	
+	keys = []
+	counts = {}
+	for record in records:
+		key = None
+		if getPathPtCnt(record) <= opts['chunkPts']:
+			key = getShapeKey(record)
+			counts[key] = counts.get(key, 0) + 1
+		keys.append(key)
 	
-	# apply object size
-	x *= meshData.size[0]
-	y *= meshData.size[1]
-	z *= meshData.size[2]
+	repeated = {}
+	for key in keys:
+		if key != None and counts[key] > 1 and key not in repeated:
+			repeated[key] = len(repeated)
 	
-	# apply object x axis rotation
-	vertsRot = degRot(y, z, meshData.rot[0] / (math.pi * 2.0 / 360.0))
-	y = vertsRot[0]
-	z = vertsRot[1]
+	return keys, repeated
+
+
+# format the body of a repeated path as moves relative to its first point,
+# the offsets from the first point are rounded before the moves are found
+# so the rounding doesn't build up, returns the body and last motion word
+def genRepeatBody(record, opts):
 	
-	# apply object y axis rotation
-	vertsRot = degRot(x, z, -meshData.rot[1] / (math.pi * 2.0 / 360.0))
-	x = vertsRot[0]
-	z = vertsRot[1]
+	chunk = next(genPathStages(record, opts, getPathPtCnt(record)))
+	xPts, yPts, zPts, arcs = chunk
 	
-	# apply object z axis rotation
-	vertsRot = degRot(x, y, meshData.rot[2] / (math.pi * 2.0 / 360.0))
-	x = vertsRot[0]
-	y = vertsRot[1]
+	p = opts['precision']
+	x, y, z = xPts[0], yPts[0], zPts[0]
+	xPts = [round(v - x, p) for v in xPts]
+	yPts = [round(v - y, p) for v in yPts]
+	zPts = [round(v - z, p) for v in zPts]
 	
-	# apply object location
-	x += meshData.loc[0]
-	y += meshData.loc[1]
-	z += meshData.loc[2]
+	relOpts = dict(opts)
+	relOpts['relCoord'] = 1
 	
-	return (x, y, z)
+	state = {'motion': "G1"}
+	body = ''.join(timeStage('format', genPathText(iter([(xPts, yPts, zPts, arcs)]), relOpts, state)))
+	
+	return body, state['motion']
 
 
-# script main function
-def ExportToGcode(file_name):
+# generate a path block, returns the block and the processor seconds it took
+def timePathBlock(record, opts):
 	
-	# add up the selected layers after converting to binary
-	selectedLayers = Window.ViewLayers()
-	selectedLayersMask = 0
-	for aL in selectedLayers:
-		selectedLayersMask += 1<<(aL-1)
+	# import numpy before the time starts, so the import
+	# isn't counted as time the cache saves
+	if getPathPtCnt(record) >= numpyMinPts:
+		haveNumpy()
 	
-	# get a list of meshes
-	scene = Scene.GetCurrent()
-	meshes = []
-	for ob in scene.objects:
-		if selectedLayersMask & ob.Layer: # use only meshes in selected layers
-			obtype = ob.type
-			if obtype == "Mesh":
-				meshes.append(ob)
+	t = cpuTime()
+	block = genPathBlock(record, opts)
 	
-	# return if found no meshes
-	if meshes == []:
-		print("No meshes found.")
+	return block, cpuTime() - t
+
+
+# worker process function, makes the blocks of every step-th record from
+# first and sends them back, the process is started with fork so the
+# records and this function are not pickled (Blender runs the script
+# with exec, so it can't be found by name in a new process)
+def sendPathBlocks(records, opts, first, step, conn):
+	
+	for i in range(first, len(records), step):
+		conn.send(timePathBlock(records[i], opts))
+	conn.close()
+
+
+# open the block cache directory, blocks are files named by their key
+def openBlockCache(path):
+	
+	if not os.path.isdir(path):
+		try:
+			os.makedirs(path)
+		except OSError:
+			return None
+	
+	return {'path': path, 'hits': 0, 'misses': 0, 'saved': 0.0}
+
+
+# get the cache key of a path block, a hash of the path,
+# transform, path direction and the options the block depends on
+def getBlockKey(record, opts):
+	
+	key = hashlib.md5()
+	key.update(toBytes(repr((cacheVersion, record['size'], record['rot'], record['loc'],
+	                         bool(record.get('reverse')), [opts[o] for o in cacheOpts]))))
+	hashPath(key, record)
+	
+	return key.hexdigest()
+
+
+# load a cached path block, returns None if it is not in the cache
+def loadCacheBlock(cache, key):
+	
+	t = cpuTime()
+	path = os.path.join(cache['path'], key + ".blk")
+	try:
+		file = open(path, "r")
+	except IOError:
+		return None
+	
+	try:
+		try:
+			version, start, end, motion, genTime = json.loads(file.readline())
+			body = file.read()
+		finally:
+			file.close()
+		
+		start = tuple([float(v) for v in start])
+		end = tuple([float(v) for v in end])
+		genTime = float(genTime)
+		if version != cacheVersion or motion not in ("G1", "G2", "G3") or len(start) != 3 or len(end) != 3:
+			raise ValueError("bad block")
+	except Exception:
+		# a block that can't be read is removed so it is saved again
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+		return None
+	
+	block = (start, end, str(motion), body)
+	
+	# mark it as recently used
+	try:
+		os.utime(path, None)
+	except OSError:
+		pass
+	
+	cache['hits'] += 1
+	cache['saved'] += max(0.0, genTime - (cpuTime() - t))
+	
+	return block
+
+
+# save a path block and the seconds it took to generate
+def saveCacheBlock(cache, key, block, genTime):
+	
+	cache['misses'] += 1
+	
+	path = os.path.join(cache['path'], key + ".blk")
+	tmpPath = "%s.%d.tmp" % (path, os.getpid())
+	try:
+		start, end, motion, body = block
+		file = open(tmpPath, "w")
+		try:
+			file.write(json.dumps([cacheVersion, list(start), list(end), motion, genTime]) + "\n")
+			file.write(body)
+		finally:
+			file.close()
+		
+		if os.path.exists(path):
+			os.remove(tmpPath)
+		else:
+			os.rename(tmpPath, path)
+	except (IOError, OSError):
+		if os.path.exists(tmpPath):
+			os.remove(tmpPath)
+
+
+# remove the least recently used blocks until the cache is small enough
+def closeBlockCache(cache):
+	
+	blocks = []
+	total = 0
+	for name in os.listdir(cache['path']):
+		if not name.endswith(".blk"):
+			continue
+		
+		try:
+			st = os.stat(os.path.join(cache['path'], name))
+		except OSError:
+			continue
+		
+		blocks.append((st.st_mtime, st.st_size, name))
+		total += st.st_size
+	
+	blocks.sort()
+	for mtime, size, name in blocks:
+		if total <= cacheMaxSize:
+			break
+		
+		try:
+			os.remove(os.path.join(cache['path'], name))
+		except OSError:
+			pass
+		total -= size
+
+
+# get the number of worker processes to use, 0 uses all cores,
+# the workers need fork to inherit the records
+def getWorkerCnt(opts):
+	
+	if multiprocessing == None or not hasattr(os, 'fork'):
+		return 1
+	
+	if opts['workers'] <= 0:
+		return multiprocessing.cpu_count()
+	
+	return opts['workers']
+
+
+# generate the blocks of the records that are not cached in order,
+# using worker processes when there are enough points and workers to
+# share them, yields each block and the seconds it took
+def genNewBlocks(records, opts):
+	
+	workers = getWorkerCnt(opts)
+	
+	ptCnt = 0
+	for record in records:
+		ptCnt += getPathPtCnt(record) - 1
+	
+	if workers < 2 or len(records) < 2 or ptCnt < parallelMinPts:
+		for record in records:
+			yield timePathBlock(record, opts)
 		return
+	
+	workers = min(workers, len(records))
+	if hasattr(multiprocessing, 'get_context'):
+		mp = multiprocessing.get_context('fork')
+	else:
+		mp = multiprocessing
+	
+	# worker w makes the blocks of records w, w + workers, ... and sends
+	# them through its own pipe, the parent's copy of the sending end is
+	# closed so a worker that stops is noticed, its blocks are made here
+	procs = []
+	conns = []
+	try:
+		try:
+			for w in range(0, workers):
+				recvConn, sendConn = mp.Pipe(False)
+				conns.append(recvConn)
+				try:
+					proc = mp.Process(target=sendPathBlocks, args=(records, opts, w, workers, sendConn))
+					proc.daemon = True
+					proc.start()
+					procs.append(proc)
+				finally:
+					sendConn.close()
+		except (OSError, IOError):
+			for proc in procs:
+				proc.terminate()
+			for conn in conns:
+				conn.close()
+			conns = [None] * workers
+		
+		for i in range(0, len(records)):
+			conn = conns[i % workers]
+			block = None
+			if conn != None:
+				try:
+					block = conn.recv()
+				except (EOFError, IOError):
+					conn.close()
+					conns[i % workers] = None
+			
+			if block == None:
+				block = timePathBlock(records[i], opts)
+			yield block
+	finally:
+		for proc in procs:
+			if proc.is_alive():
+				proc.terminate()
+			proc.join()
+		for conn in conns:
+			if conn != None:
+				conn.close()
 
-	# sort meshes alphabetically
-	meshNames = []
-	sortedMeshNames = []
-	for mesh in meshes:
-		meshNames.append(mesh.getName().split('-')[-1])
-		sortedMeshNames.append(mesh.getName().split('-')[-1])
+
+# generate the path blocks in order, the paths with more points than a
+# chunk are streamed by genGcode so None is yielded for them
+def genPathBlocks(records, opts, cache=None):
 	
-	sortedMeshNames.sort()
+	streamed = [getPathPtCnt(r) > opts['chunkPts'] for r in records]
+	blocks = genCachedBlocks([r for r, s in zip(records, streamed) if not s], opts, cache)
 	
-	sortedMeshes = []
-	for sortedMeshName in sortedMeshNames:
-		sortedMeshes.append(meshes[meshNames.index(sortedMeshName)])
-	meshes = sortedMeshes
+	for s in streamed:
+		if s:
+			yield None
+		else:
+			yield next(blocks)
 
-	# change to object mode
-	in_editmode = Window.EditMode()
-	if in_editmode: Window.EditMode(0)
 
+# generate the path blocks in order, the blocks found in the
+# cache are loaded and the new ones are saved to it
+def genCachedBlocks(records, opts, cache=None):
+	
+	if cache == None:
+		for block, genTime in genNewBlocks(records, opts):
+			yield block
+		return
+	
+	keys = [getBlockKey(r, opts) for r in records]
+	isNew = [not os.path.exists(os.path.join(cache['path'], k + ".blk")) for k in keys]
+	newBlocks = genNewBlocks([r for r, n in zip(records, isNew) if n], opts)
+	
+	for record, key, new in zip(records, keys, isNew):
+		block = None
+		if not new:
+			block = loadCacheBlock(cache, key)
+		
+		if block == None:
+			if new:
+				block, genTime = next(newBlocks)
+			else:
+				block, genTime = timePathBlock(record, opts)
+			saveCacheBlock(cache, key, block, genTime)
+		
+		yield block
+
+
+# generate the g-code of the paths of mesh records, tool holds the
+# point the tool is at before and after them
+def genPathsGcode(records, opts, cache, tool, modal):
+	
+	prior = tool['prior']
+	
+	# split the meshes into paths that follow their edges if true,
+	# or into the runs of edges that follow each other
+	paths = []
+	for record in records:
+		if (opts['reorder']):
+			t = cpuTime()
+			for path in genRecordPaths(record):
+				paths.append(path)
+			if stageTimes != None:
+				stageTimes['reorder'] += cpuTime() - t
+		else:
+			for path in genRecordRuns(record):
+				paths.append(path)
+	records = paths
+	
+	records = orderPaths(records, opts)
+	
+	# the copies of a path only differ by their location, their
+	# body is made once from the first copy
+	keys = [None] * len(records)
+	repeated = {}
+	if opts['repeats'] != repeatsNone:
+		keys, repeated = findRepeatedShapes(records, opts)
+	
+	bodies = {}
+	for record, key in zip(records, keys):
+		if key in repeated and key not in bodies:
+			bodies[key] = genRepeatBody(record, opts)
+	
+	# switch to relative coordinates for the repeated bodies
+	relStart = ""
+	relEnd = ""
+	if not (opts['relCoord']):
+		relStart = "G91\n"
+		relEnd = "G90\n"
+	
+	# the subroutines are written before they are called
+	if opts['repeats'] == repeatsSub:
+		written = {}
+		for record, key in zip(records, keys):
+			if key in bodies and key not in written:
+				num = subFirstNum + repeated[key]
+				yield "( %s )\no%d sub\n%s%s%so%d endsub\n\n" % (record['name'], num, relStart, bodies[key][0], relEnd, num)
+				written[key] = 1
+	
+	blocks = genPathBlocks([r for r, k in zip(records, keys) if k not in repeated], opts, cache)
+	
+	for record, key in zip(records, keys):
+		
+		# write a rapid move and the call or moves of a repeated path
+		if key in repeated:
+			start, end = getPathEnds(record)
+			if record.get('reverse'):
+				start, end = end, start
+			
+			yield formatPathHead(record['name'], start[0], start[1], start[2], prior, opts, modal)
+			
+			body, motion = bodies[key]
+			if opts['repeats'] == repeatsSub:
+				yield "o%d call\n\n" % (subFirstNum + repeated[key])
+			else:
+				yield relStart + body + relEnd + "\n"
+			
+			prior = end
+			if (opts['modal']):
+				modal['G'] = motion
+				if not (opts['relCoord']):
+					modal['X'], modal['Y'], modal['Z'] = fmtWordVals(prior, opts['precision'])
+			continue
+		
+		block = next(blocks)
+		
+		# stream the paths that are too long to hold at once
+		if block == None:
+			chunks = genPathStages(record, opts, opts['chunkPts'])
+			first = next(chunks)
+			
+			yield formatPathHead(record['name'], first[0][0], first[1][0], first[2][0], prior, opts, modal)
+			
+			state = {'motion': "G1"}
+			for text in timeStage('format', genPathText(itertools.chain([first], chunks), opts, state)):
+				yield text
+			yield "\n"
+			
+			end, motion = state['end'], state['motion']
+		else:
+			start, end, motion, body = block
+			
+			yield formatPathHead(record['name'], start[0], start[1], start[2], prior, opts, modal)
+			yield body
+			yield "\n"
+		
+		prior = end
+		
+		# the body leaves the last point's words set
+		if (opts['modal']):
+			modal['G'] = motion
+			if not (opts['relCoord']):
+				modal['X'], modal['Y'], modal['Z'] = fmtWordVals(prior, opts['precision'])
 	
-	feedRate = float(feedRate_TEXT)
-	xPrior = 0.0
-	yPrior = 0.0
-	zPrior = 0.0
+	tool['prior'] = prior
+
+
+# generate the g-code text for a list of mesh records
+def genGcode(records, opts, cache=None):
 	
-	file = open(file_name, "w")
+	f = "%%.%df" % (opts['precision'])
+	prior = (0.0, 0.0, 0.0)
+	modal = {}
 	
-	if (relCoord_TOG):
-		file.write("( Using relative coordinates )\n")
-		file.write("G91\n")
-		file.write("\n")
+	if (opts['relCoord']):
+		yield "( Using relative coordinates )\nG91\n\n"
 	else:
-		file.write("G90\n")
-		file.write("\n")
+		yield "G90\n\n"
 	
-	if (setZero_TOG):
-		file.write("( Set current position as 0,0,0 )\n")
-		file.write("G92 X%f Y%f Z%f\n" % (0.0, 0.0, 0.0))
-		file.write("\n")
+	if (opts['setZero']):
+		yield ("( Set current position as 0,0,0 )\nG92 X%s Y%s Z%s\n\n" % (f, f, f)) % (0.0, 0.0, 0.0)
 	
-	for mesh in meshes:
-		file.write("( %s )\n" % (mesh.name))
-		
-		edges = list(mesh.getData().edges)
-		
-		x = mesh.data.verts[edges[0].v1.index][0]
-		y = mesh.data.verts[edges[0].v1.index][1]
-		z = mesh.data.verts[edges[0].v1.index][2]
-		
-		x, y, z = applyTrans(x, y, z, mesh)
-		
-		# find relative coordinates if true
-		if (relCoord_TOG):
-			xRel = x - xPrior
-			yRel = y - yPrior
-			zRel = z - zPrior
-			xPrior, yPrior, zPrior = x, y, z
-			x, y, z = xRel, yRel, zRel
-		
-		# write positioning code if true
-		if (addG0_TOG):
-			file.write("G0 X%f\n" % (x))
-			file.write("G0 Y%f\n" % (y))
-			file.write("G0 Z%f\n" % (z))
-			xRel = x - xPrior
-			yRel = y - yPrior
-			zRel = z - zPrior
-			xPrior, yPrior, zPrior = x, y, z
-			x, y, z = xRel, yRel, zRel
-		
-		file.write("G1 F%f X%f Y%f Z%f\n" % (feedRate, x, y, z))
-		
-		for edge in edges:
+	# the meshes are read and written a few at a time, one for each worker
+	# process, unless the paths are ordered or copies are looked for which
+	# needs all of them
+	if (opts['order']) or opts['repeats'] != repeatsNone:
+		groups = [records]
+	else:
+		records = sorted(records, key=lambda r: r['name'].split('-')[-1])
+		groupSize = getWorkerCnt(opts)
+		groups = [records[i:i+groupSize] for i in range(0, len(records), groupSize)]
+	
+	tool = {'prior': prior}
+	for group in groups:
+		group = [loadMeshRecord(r) for r in group]
+		for text in genPathsGcode(group, opts, cache, tool, modal):
+			yield text
+		
+		# let go of the mesh before the next one is read
+		group = None
+	prior = tool['prior']
+	
+	# write positioning code if true, return to 0,0,0
+	if (opts['addG0']):
+		if (opts['relCoord']):
+			x, y, z = -prior[0], -prior[1], -prior[2]
+		else:
+			x, y, z = 0.0, 0.0, 0.0
+		
+		if (opts['modal']):
+			yield formatModalLine("G0", [('Z', z)], modal, opts)
+			yield formatModalLine("G0", [('Y', y)], modal, opts)
+			yield formatModalLine("G0", [('X', x)], modal, opts)
+		else:
+			yield ("G0 Z%s\nG0 Y%s\nG0 X%s\n" % (f, f, f)) % (z, y, x)
+	
+	yield "M2\n"
+
+
+# open the g-code file, gzip compressed if true
+def openGcodeFile(file_name, useGzip):
+	
+	if useGzip:
+		return gzip.GzipFile(file_name, "wb", 6)
+	
+	return open(file_name, "wb", writeChunkSize)
+
+
+# write a chunk of g-code text
+def writeChunk(file, chunk):
+	
+	t = cpuTime()
+	file.write(toBytes(''.join(chunk)))
+	
+	if stageTimes != None:
+		stageTimes['write'] += cpuTime() - t
+
+
+# write the g-code for a list of mesh records in large chunks,
+# using the path blocks in the cache if one is given
+def writeGcode(records, file_name, opts=None, cache=None):
+	
+	if opts == None:
+		opts = getExportOptions()
+	
+	file = openGcodeFile(file_name, opts['gzip'])
+	
+	try:
+		chunk = []
+		chunkLen = 0
+		for text in genGcode(records, opts, cache):
+			chunk.append(text)
+			chunkLen += len(text)
+			
+			if chunkLen >= writeChunkSize:
+				writeChunk(file, chunk)
+				chunk = []
+				chunkLen = 0
+		
+		writeChunk(file, chunk)
+	finally:
+		file.close()
+
+
+# read the meshes of a wavefront .obj file, every object or group
+# is a mesh and its 'l' polylines are its edges
+def readObjMeshes(file_name):
+	
+	baseName = os.path.splitext(os.path.basename(file_name))[0]
+	verts = []
+	meshes = []
+	lines = None
+	
+	file = open(file_name, "r")
+	try:
+		for line in file:
+			words = line.split()
+			if words == []:
+				continue
 			
-			x = mesh.data.verts[edge.v2.index][0]
-			y = mesh.data.verts[edge.v2.index][1]
-			z = mesh.data.verts[edge.v2.index][2]
+			if words[0] == 'v':
+				verts.append((float(words[1]), float(words[2]), float(words[3])))
 			
-			x, y, z = applyTrans(x, y, z, mesh)
+			elif words[0] in ('o', 'g'):
+				lines = []
+				meshes.append((' '.join(words[1:]) or baseName, lines))
 			
-			# find relative coordinates if true
-			if (relCoord_TOG):
-				xRel = x - xPrior
-				yRel = y - yPrior
-				zRel = z - zPrior
-				xPrior, yPrior, zPrior = x, y, z
-				x, y, z = xRel, yRel, zRel
+			elif words[0] == 'l':
+				if lines == None:
+					lines = []
+					meshes.append((baseName, lines))
+				
+				# indices start at 1, negative ones count back from the last vertex
+				ids = []
+				for w in words[1:]:
+					i = int(w.split('/')[0])
+					if i < 0:
+						ids.append(len(verts) + i)
+					else:
+						ids.append(i - 1)
+				lines.append(ids)
+	finally:
+		file.close()
+	
+	# give each mesh only the vertices it uses
+	records = []
+	for name, lines in meshes:
+		meshVerts = []
+		newIds = {}
+		edges = []
+		for ids in lines:
+			for i in ids:
+				if i not in newIds:
+					if i < 0 or i >= len(verts):
+						raise ValueError("%s: vertex index out of range" % (name))
+					newIds[i] = len(meshVerts)
+					meshVerts.append(verts[i])
 			
-			file.write("G1 X%f Y%f Z%f\n" % (x, y, z))
+			for a, b in zip(ids, ids[1:]):
+				edges.append((newIds[a], newIds[b]))
 		
-		file.write("\n")
+		records.append(makeMeshRecord(name, meshVerts, edges))
+	
+	return records
 
-	# write positioning code if true
-	if (addG0_TOG):
-		file.write("G0 Z%f\n" % (0.0))
-		file.write("G0 Y%f\n" % (0.0))
-		file.write("G0 X%f\n" % (0.0))
+
+# read the meshes of a .json file, a list of meshes (or an object with
+# a "meshes" list) each with "name", "verts" and "edges" and optional
+# "size", "rot" (radians), "loc" and "layers"
+def readJsonMeshes(file_name):
+	
+	file = open(file_name, "r")
+	try:
+		data = json.load(file)
+	finally:
+		file.close()
+	
+	if isinstance(data, dict):
+		data = data['meshes']
+	
+	records = []
+	for i in range(0, len(data)):
+		mesh = data[i]
+		records.append(makeMeshRecord(mesh.get('name', "mesh-%d" % (i)), mesh['verts'], mesh['edges'],
+		                              mesh.get('size', (1.0, 1.0, 1.0)), mesh.get('rot', (0.0, 0.0, 0.0)),
+		                              mesh.get('loc', (0.0, 0.0, 0.0)), mesh.get('layers', 1)))
 	
-	file.write("M2\n")
-	file.close()
+	return records
+
+
+# read the meshes of a numpy .npz file, the arrays of a mesh are
+# named "<mesh name>/verts" (n x 3) and "<mesh name>/edges" (n x 2) with
+# optional "<mesh name>/size", "/rot", "/loc" and "/layers" arrays
+def readNpzMeshes(file_name):
+	
+	if not haveNumpy():
+		raise ValueError("reading .npz files needs numpy")
+	
+	data = numpy.load(file_name)
+	try:
+		records = []
+		for key in sorted(data.files):
+			if not key.endswith("/verts"):
+				continue
+			
+			name = key[:-len("/verts")]
+			args = [name, data[key].tolist(), data[name + "/edges"].tolist()]
+			for part, default in (("size", (1.0, 1.0, 1.0)), ("rot", (0.0, 0.0, 0.0)),
+			                      ("loc", (0.0, 0.0, 0.0)), ("layers", 1)):
+				if name + "/" + part in data.files:
+					args.append(data[name + "/" + part].tolist())
+				else:
+					args.append(default)
+			
+			records.append(makeMeshRecord(*args))
+	finally:
+		data.close()
+	
+	return records
+
+
+# mesh dump readers by file extension
+meshReaders = {'.obj': readObjMeshes, '.json': readJsonMeshes, '.npz': readNpzMeshes}
+
+
+# export one mesh dump file, job is the dump name, the g-code
+# file name, the options and the layers mask, returns an error or None
+def exportMeshFile(job):
+	
+	file_name, ngcName, opts, layersMask = job
+	
+	try:
+		records = meshReaders[os.path.splitext(file_name)[1].lower()](file_name)
+		ngcName = exportRecords(records, ngcName, opts, layersMask)
+	except (IOError, OSError, ValueError, KeyError, IndexError, TypeError):
+		return "%s: %s" % (file_name, sys.exc_info()[1])
+	
+	if ngcName != None:
+		print("%s -> %s" % (file_name, ngcName))
+	
+	return None
+
+
+# command line main function, exports each mesh dump to a g-code file
+# with the same name, several files are exported by a pool of workers
+def cliMain(args):
+	
+	parser = optparse.OptionParser(usage="%prog [options] mesh_file ...",
+		description="Export the mesh edges of .obj, .json or .npz mesh dumps to g-code (.ngc) files.")
+	parser.add_option("-o", "--output-dir", help="directory to write the g-code files to, the default is next to each mesh file")
+	parser.add_option("-f", "--feed-rate", type="float", default=float(feedRate_TEXT), help="feed rate to use for 'G1' code [%default]")
+	parser.add_option("-d", "--decimals", type="int", default=int(precision_TEXT), help="number of decimal places to write [%default]")
+	parser.add_option("--no-g0", action="store_true", help="don't add 'G0' positioning code")
+	parser.add_option("--set-zero", action="store_true", help="add 'G92' to set the current position to 0,0,0")
+	parser.add_option("--relative", action="store_true", help="use relative coordinates")
+	parser.add_option("--gzip", action="store_true", help="write gzip compressed '.ngc.gz' files")
+	parser.add_option("--modal", action="store_true", help="only write the words that change")
+	parser.add_option("--simplify", type="float", metavar="TOL", help="remove points within TOL of a straight line")
+	parser.add_option("--arcs", type="float", metavar="TOL", help="write points within TOL of a circle as 'G2' and 'G3' arcs")
+	parser.add_option("--order", action="store_true", help="order the paths to shorten the 'G0' moves instead of by name")
+	parser.add_option("--no-reverse", action="store_true", help="don't let ordered paths start at either end")
+	parser.add_option("--layers", help="comma separated layers (1 to 20) to export, the default is all")
+	parser.add_option("--cache", action="store_true", help="reuse the g-code of unchanged paths from a '%s' directory" % (cacheDirName))
+	parser.add_option("-j", "--workers", type="int", default=0, help="number of worker processes, 0 uses all cores [%default]")
+	parser.add_option("--reorder", action="store_true", help="split each mesh into paths that follow its connected edges")
+	parser.add_option("--chunk-pts", type="int", default=streamChunkPts, help="stream paths with more points than this in chunks of this many points [%default]")
+	parser.add_option("--stats", action="store_true", help="print the time spent in each export stage")
+	parser.add_option("--repeats", type="choice", choices=["off", "sub", "inline"], default="off",
+	                  help="write copies of a path once as an o-word subroutine (sub) or as repeated relative moves (inline) [%default]")
+	options, files = parser.parse_args(args)
+	
+	if files == []:
+		parser.error("no mesh files given")
+	
+	for file_name in files:
+		if os.path.splitext(file_name)[1].lower() not in meshReaders:
+			parser.error("%s: not a .obj, .json or .npz file" % (file_name))
+	
+	layersMask = None
+	if options.layers:
+		try:
+			layers = [int(l) for l in options.layers.split(',')]
+		except ValueError:
+			parser.error("--layers must be numbers separated by commas")
+		layersMask = getLayersMask(layers)
+	
+	opts = getExportOptions()
+	opts.update({'feedRate': options.feed_rate, 'precision': max(0, min(12, options.decimals)),
+	             'addG0': int(not options.no_g0), 'setZero': int(bool(options.set_zero)),
+	             'relCoord': int(bool(options.relative)), 'gzip': int(bool(options.gzip)),
+	             'modal': int(bool(options.modal)), 'simplify': int(options.simplify != None),
+	             'arcs': int(options.arcs != None), 'order': int(bool(options.order)),
+	             'reverse': int(not options.no_reverse), 'cache': int(bool(options.cache)),
+	             'workers': options.workers, 'reorder': int(bool(options.reorder)),
+	             'chunkPts': max(2, options.chunk_pts), 'stats': int(bool(options.stats)),
+	             'repeats': ["off", "sub", "inline"].index(options.repeats)})
+	if options.simplify != None:
+		opts['simplifyTol'] = options.simplify
+	if options.arcs != None:
+		opts['arcTol'] = options.arcs
+	
+	if options.output_dir and not os.path.isdir(options.output_dir):
+		os.makedirs(options.output_dir)
+	
+	jobs = []
+	for file_name in files:
+		ngcName = os.path.splitext(file_name)[0] + ".ngc"
+		if options.output_dir:
+			ngcName = os.path.join(options.output_dir, os.path.basename(ngcName))
+		jobs.append((file_name, ngcName, opts, layersMask))
+	
+	workers = opts['workers']
+	if workers <= 0 and multiprocessing != None:
+		workers = multiprocessing.cpu_count()
+	
+	# export the files in worker processes, each one generates its paths itself
+	if workers >= 2 and len(jobs) >= 2 and multiprocessing != None:
+		opts['workers'] = 1
+		pool = multiprocessing.Pool(min(workers, len(jobs)))
+		try:
+			errors = pool.map(exportMeshFile, jobs)
+			pool.close()
+		finally:
+			pool.terminate()
+			pool.join()
+	else:
+		errors = [exportMeshFile(job) for job in jobs]
+	
+	errors = [e for e in errors if e != None]
+	for error in errors:
+		sys.stderr.write(error + "\n")
+	
+	if errors:
+		return 1
+	
+	return 0
 
 
 
 def FileSelectorCB(file_name):
-	if not file_name.lower().endswith('.ngc'):
+	if not file_name.lower().endswith(('.ngc', '.ngc.gz')):
 		file_name += '.ngc'
 	ExportToGcode(file_name)
 
@@ -223,15 +2203,43 @@ def event(evt, val):
 # text edit events
 def textEdit_ev(evt, val):
 	global feedRate_TEXT
+	global precision_TEXT
+	global simplifyTol_TEXT
+	global arcTol_TEXT
+	global workers_TEXT
+	global repeats_MENU
 	
 	if evt == feedRate_HDL:
 		feedRate_TEXT = val
+	
+	if evt == precision_HDL:
+		precision_TEXT = val
+	
+	if evt == simplifyTol_HDL:
+		simplifyTol_TEXT = val
+	
+	if evt == arcTol_HDL:
+		arcTol_TEXT = val
+	
+	if evt == workers_HDL:
+		workers_TEXT = val
+	
+	if evt == repeats_HDL:
+		repeats_MENU = val
 
 # handle button events
 def button_event(evt):
 	global relCoord_TOG
 	global setZero_TOG
 	global addG0_TOG
+	global gzip_TOG
+	global modal_TOG
+	global simplify_TOG
+	global arcs_TOG
+	global order_TOG
+	global reverse_TOG
+	global cache_TOG
+	global reorder_TOG
 	
 	if evt == relCoord_HDL:
 		relCoord_TOG = 1^relCoord_TOG
@@ -242,6 +2250,30 @@ def button_event(evt):
 	if evt == addG0_HDL:
 		addG0_TOG = 1^addG0_TOG
 		
+	if evt == gzip_HDL:
+		gzip_TOG = 1^gzip_TOG
+		
+	if evt == modal_HDL:
+		modal_TOG = 1^modal_TOG
+		
+	if evt == simplify_HDL:
+		simplify_TOG = 1^simplify_TOG
+		
+	if evt == arcs_HDL:
+		arcs_TOG = 1^arcs_TOG
+		
+	if evt == order_HDL:
+		order_TOG = 1^order_TOG
+		
+	if evt == reverse_HDL:
+		reverse_TOG = 1^reverse_TOG
+		
+	if evt == cache_HDL:
+		cache_TOG = 1^cache_TOG
+		
+	if evt == reorder_HDL:
+		reorder_TOG = 1^reorder_TOG
+		
 	if evt == blendDir_HDL:
 		ExportToGcode(sys.makename(ext='.ngc'))
 	
@@ -258,7 +2290,20 @@ def gui():
 	global relCoord_TOG
 	global setZero_TOG
 	global addG0_TOG
+	global gzip_TOG
+	global modal_TOG
+	global simplify_TOG
+	global arcs_TOG
+	global order_TOG
+	global reverse_TOG
+	global cache_TOG
+	global reorder_TOG
 	global feedRate_TEXT
+	global precision_TEXT
+	global simplifyTol_TEXT
+	global arcTol_TEXT
+	global workers_TEXT
+	global repeats_MENU
 	
 	
 	BGL.glClearColor(0.72,0.7,0.7,1)
@@ -284,6 +2329,9 @@ def gui():
 	y += 20
 	ret = Draw.String("Feed Rate:", feedRate_HDL, x, y, 155, 25, feedRate_TEXT, 9, "Feed rate to use for 'G1' code.", textEdit_ev)
 
+	y += 30
+	ret = Draw.String("Decimals:", precision_HDL, x, y, 155, 25, precision_TEXT, 2, "Number of decimal places to write for each coordinate.", textEdit_ev)
+
 	y += 30
 	Draw.Toggle("Add 'G0' positioning code", addG0_HDL, x, y, 155, 20, addG0_TOG, "Add extra 'G0' code at the start and end of each path.")
 
@@ -293,6 +2341,40 @@ def gui():
 	y += 25
 	Draw.Toggle("Use relative coordinates", relCoord_HDL, x, y, 155, 20, relCoord_TOG, "Use relative instead of absolute coordinates.")
 	
+	y += 25
+	Draw.Toggle("Gzip compress output", gzip_HDL, x, y, 155, 20, gzip_TOG, "Write a gzip compressed '.ngc.gz' file.")
+	
+	y += 25
+	Draw.Toggle("Compact modal words", modal_HDL, x, y, 155, 20, modal_TOG, "Only write the words that change, without trailing zeros.")
+	
+	y += 25
+	Draw.Toggle("Reorder lines", reorder_HDL, x, y, 155, 20, reorder_TOG, "Split each mesh into paths that follow its connected edges.")
+	
+	y += 25
+	ret = Draw.Menu("Copies %t|Write each copy %x1|Subroutine calls %x2|Repeat relative moves %x3", repeats_HDL, x, y, 155, 20, repeats_MENU, "How to write paths that are copies of another path moved somewhere else.", textEdit_ev)
+	
+	
+	x = 175
+	y = 125
+	Draw.Toggle("Simplify", simplify_HDL, x, y, 76, 25, simplify_TOG, "Remove points that are within the tolerance of a straight line.")
+	ret = Draw.String("Tol:", simplifyTol_HDL, x+80, y, 76, 25, simplifyTol_TEXT, 12, "The largest distance a removed point may be from the path.", textEdit_ev)
+	
+	y += 30
+	Draw.Toggle("Arcs", arcs_HDL, x, y, 76, 25, arcs_TOG, "Write points that are on a circle as 'G2' and 'G3' arcs.")
+	ret = Draw.String("Tol:", arcTol_HDL, x+80, y, 76, 25, arcTol_TEXT, 12, "The largest distance a point may be from its arc.", textEdit_ev)
+	
+	y += 30
+	Draw.Toggle("Order", order_HDL, x, y, 76, 25, order_TOG, "Order the paths to shorten the 'G0' moves between them instead of by name.")
+	Draw.Toggle("Reverse", reverse_HDL, x+80, y, 76, 25, reverse_TOG, "Let ordered paths start at either end.")
+	
+	y += 30
+	ret = Draw.String("Workers:", workers_HDL, x, y, 76, 25, workers_TEXT, 3, "Number of processes generating g-code, 0 uses all cores.", textEdit_ev)
+	Draw.Toggle("Cache", cache_HDL, x+80, y, 76, 25, cache_TOG, "Reuse the g-code of unchanged paths from the '%s' directory next to the file." % (cacheDirName))
+	
+	y += 30
+	BGL.glRasterPos2i(x, y)
+	Draw.Text("PATH OPTIONS")
+	
 	
 	y = 90
 	BGL.glRasterPos2i(180, y)
@@ -305,5 +2387,8 @@ def gui():
 	Draw.Text("Use \"reorder_vertex_line.py\" to untangle the vertex sequence and give a starting point.")
 
 
-# registering the 3 callbacks
-Draw.Register(gui, event, button_event)
+# registering the 3 callbacks, or run from the command line
+if inBlender:
+	Draw.Register(gui, event, button_event)
+elif __name__ == '__main__':
+	sys.exit(cliMain(sys.argv[1:]))
@@ -0,0 +1,104 @@
+# times the curve script's point generation (getArcPts), with numpy and
+# without, against the old recurrence that turned each point from the last
+# one, on a spiral turning ten times, and prints how far each one's last
+# point is from where it should be,
+# run it with: python tests/bench_arc_points.py [points ...]
+import sys
+import os
+import math
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import create_circ_curve
+
+# the spiral, from 10 to 3610 degrees and radius 1 to 50
+deg1 = 10.0
+deg2 = 3610.0
+rad1 = 1.0
+rad2 = 50.0
+
+# the largest distance of the new last point from the exact one
+endTol = 1e-9
+
+
+# the old curve points, as createCurve made them
+def getArcPtsOld(deg1, deg2, rad1, rad2, pts):
+
+	degInc = (deg2 - deg1) / (pts-1.0)
+	radInc = (rad2 - rad1) / (pts-1.0)
+
+	c = math.cos(-degInc / 360.0 * math.pi * 2.0)
+	s = math.sin(-degInc / 360.0 * math.pi * 2.0)
+
+	vPrior = math.cos(deg1 / 360.0 * math.pi * 2.0)
+	hPrior = math.sin(deg1 / 360.0 * math.pi * 2.0)
+
+	verts = [(hPrior*rad1, vPrior*rad1, 0.0)]
+	edges = []
+	for i in range(1, int(pts)):
+		v = hPrior * s + vPrior * c
+		h = vPrior * -s + hPrior * c
+		verts.append((h*(rad1+radInc*i), v*(rad1+radInc*i), 0.0))
+		edges.append((i-1, i))
+
+		vPrior = v
+		hPrior = h
+
+	return verts, edges
+
+
+# the new points, numpy is only used for at least numpyMinPts points, the
+# unit arc tables are cleared so neither run uses the other's table
+def getArcPtsNew(useNumpy, pts):
+
+	create_circ_curve.unitArcs.clear()
+	savedMinPts = create_circ_curve.numpyMinPts
+	if not useNumpy:
+		create_circ_curve.numpyMinPts = pts + 1
+	try:
+		return create_circ_curve.getArcPts(deg1, deg2, rad1, rad2, pts)
+	finally:
+		create_circ_curve.numpyMinPts = savedMinPts
+
+
+def runBenchmark(pts):
+
+	endX = math.sin(math.radians(deg2)) * rad2
+	endY = math.cos(math.radians(deg2)) * rad2
+
+	runs = [("old", lambda: getArcPtsOld(deg1, deg2, rad1, rad2, pts))]
+	if create_circ_curve.haveNumpy():
+		runs.append(("numpy", lambda: getArcPtsNew(1, pts)))
+	runs.append(("python", lambda: getArcPtsNew(0, pts)))
+
+	line = "%9d points" % (pts)
+	newErr = 0.0
+	for name, getPts in runs:
+		t = time.time()
+		verts, edges = getPts()
+		seconds = time.time() - t
+
+		err = math.hypot(verts[-1][0] - endX, verts[-1][1] - endY)
+		if name != "old":
+			newErr = max(newErr, err)
+
+		line += "  %s %.3fs end error %.1e" % (name, seconds, err)
+		del verts, edges
+
+	print(line)
+	sys.stdout.flush()
+
+	return newErr <= endTol
+
+
+if __name__ == "__main__":
+	ptCnts = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000, 1000000]
+
+	withinTol = 1
+	for pts in ptCnts:
+		if not runBenchmark(pts):
+			withinTol = 0
+
+	if not withinTol:
+		sys.exit(1)
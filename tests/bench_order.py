@@ -0,0 +1,88 @@
+# times the exporter's path ordering (findPathOrder) on random paths,
+# printing the rapid distance of the name order, of the nearest neighbour
+# tour alone and after the 2-opt and or-opt passes, with and without
+# reversing paths, run it with: python tests/bench_order.py [paths ...]
+import sys
+import os
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import simple_ngc_export
+
+
+# short paths at random places in a 1000 x 1000 area, or in two small
+# clusters far apart (uneven points make the endpoint grid search work harder)
+def getPathEnds(pathCnt, clusters):
+
+	ends = []
+	for i in range(0, pathCnt):
+		if clusters:
+			cx = (i % 2) * 100000.0
+			x, y = cx + random.uniform(0.0, 10.0), random.uniform(0.0, 10.0)
+		else:
+			x, y = random.uniform(0.0, 1000.0), random.uniform(0.0, 1000.0)
+
+		ang = random.uniform(0.0, 2.0 * math.pi)
+		length = random.uniform(1.0, 20.0)
+		ends.append(((x, y, 0.0), (x + math.cos(ang) * length, y + math.sin(ang) * length, 0.0)))
+
+	return ends
+
+
+# the rapid distance from 0,0,0 through the paths in order
+def getRapidDist(ends, seq, orient):
+
+	pt = (0.0, 0.0, 0.0)
+	dist = 0.0
+	for i, reverse in zip(seq, orient):
+		start, end = ends[i]
+		if reverse:
+			start, end = end, start
+		dist += simple_ngc_export.getDist(pt, start)
+		pt = end
+
+	return dist
+
+
+# order the paths, with orderPasses improvement passes
+def timePathOrder(ends, reverse, passes):
+
+	savedPasses = simple_ngc_export.orderPasses
+	simple_ngc_export.orderPasses = passes
+	try:
+		t = time.time()
+		seq, orient = simple_ngc_export.findPathOrder(ends, reverse)
+		seconds = time.time() - t
+	finally:
+		simple_ngc_export.orderPasses = savedPasses
+
+	if sorted(seq) != list(range(0, len(ends))) or (not reverse and any(orient)):
+		raise ValueError("the order is not a permutation of the paths")
+
+	return getRapidDist(ends, seq, orient), seconds
+
+
+def runBenchmark(pathCnt):
+
+	for layout, clusters in (("uniform", 0), ("clusters", 1)):
+		ends = getPathEnds(pathCnt, clusters)
+		nameDist = getRapidDist(ends, range(0, pathCnt), [0] * pathCnt)
+
+		for reverse in (0, 1):
+			nearestDist, nearestTime = timePathOrder(ends, reverse, 0)
+			improvedDist, improvedTime = timePathOrder(ends, reverse, simple_ngc_export.orderPasses)
+
+			print("%7d %-8s reverse %-3s  by name %11.0f  nearest %10.0f %6.2fs  improved %10.0f %6.2fs" % (
+			      pathCnt, layout, ["no", "yes"][reverse], nameDist, nearestDist, nearestTime,
+			      improvedDist, improvedTime))
+
+
+if __name__ == "__main__":
+	pathCnts = [int(a) for a in sys.argv[1:]] or [1000, 10000]
+
+	random.seed(7)
+	for pathCnt in pathCnts:
+		runBenchmark(pathCnt)
@@ -0,0 +1,110 @@
+# times the reorder script's path head search, the point to line index
+# and findPathHeads against the old findPathHead that compared every
+# candidate with every line, on shuffled polylines that start with a
+# double, run it with: python tests/bench_path_head.py [edges ...]
+import sys
+import random
+import time
+
+import mesh_harness
+
+reorder = mesh_harness.loadReorderScript()
+
+# the old search is only timed up to this many edges
+oldMaxEdges = 5000
+
+
+# the old path head search, as it was in reorder_vertex_line.py
+def findPathHead(ptsX, ptsY, ptsZ, linesA, linesB):
+
+	#find which 2 connected points are in the same location
+	noLengthLines = []
+	for i in range(0, len(linesA)):
+		if ptsX[linesA[i]] == ptsX[linesB[i]]:
+			noLengthLines.append(i)
+
+
+	#find the connection count for each of the "noLengthLines"
+	connectionCnts = [0] * len(noLengthLines)
+	for i in range(0, len(noLengthLines)):
+		for j in range(0, len(linesA)):
+			headLineA = linesA[noLengthLines[i]]
+			headLineB = linesB[noLengthLines[i]]
+			lineA = linesA[j]
+			lineB = linesB[j]
+
+			if (headLineA == lineA) or (headLineB == lineB) or (headLineA == lineB) or (headLineB == lineA):
+
+				# don't count its self
+				if noLengthLines[i] != j:
+					connectionCnts[i] += 1;
+
+
+	#find the path head
+	pathHeadCnt = 0
+	for i in range(0, len(noLengthLines)):
+		if connectionCnts[i] == 1:
+			pathHead = noLengthLines[i]
+			pathHeadCnt += 1
+
+	#if there is no path head then return -1
+	if pathHeadCnt == 0:
+		return -1
+
+	return pathHead
+
+
+# a polyline of edgeCnt lines at random heights, with a double at its
+# start (the last point), the lines are shuffled, a vertical polyline
+# has the same x for every point
+def getPolyline(edgeCnt, vertical):
+
+	ptsX = [float(i) for i in range(0, edgeCnt)] + [0.0]
+	ptsY = [random.random() for i in range(0, edgeCnt)]
+	ptsY.append(ptsY[0])
+	ptsZ = [0.0] * (edgeCnt + 1)
+
+	if vertical:
+		ptsX, ptsY = [0.0] * (edgeCnt + 1), ptsX
+
+	linesA = [edgeCnt] + list(range(0, edgeCnt - 1))
+	linesB = [0] + list(range(1, edgeCnt))
+
+	order = list(range(0, edgeCnt))
+	random.shuffle(order)
+	linesA = [linesA[i] for i in order]
+	linesB = [linesB[i] for i in order]
+
+	return ptsX, ptsY, ptsZ, linesA, linesB
+
+
+def runBenchmark(edgeCnt):
+
+	for name, vertical in (("random xy", 0), ("vertical", 1)):
+		ptsX, ptsY, ptsZ, linesA, linesB = getPolyline(edgeCnt, vertical)
+
+		t = time.time()
+		lineStarts, pointLines = reorder.getPointLines(len(ptsX), linesA, linesB)
+		pathHeads = reorder.findPathHeads(ptsX, ptsY, ptsZ, linesA, linesB, lineStarts)
+		newTime = time.time() - t
+
+		line = "%8d edges %-9s  new %.3fs" % (edgeCnt, name, newTime)
+
+		# the old search picked the last head, it only found the right
+		# one when no two points of a line had the same x by chance
+		if edgeCnt <= oldMaxEdges:
+			t = time.time()
+			pathHead = findPathHead(ptsX, ptsY, ptsZ, linesA, linesB)
+			line += "  old %.3fs" % (time.time() - t)
+			if not vertical:
+				line += "  same head: %s" % (pathHeads[-1:] == [pathHead])
+
+		print(line)
+
+
+if __name__ == "__main__":
+	edgeCnts = [int(a) for a in sys.argv[1:]] or [1000, 5000, 100000, 1000000]
+
+	random.seed(11)
+	for edgeCnt in edgeCnts:
+		runBenchmark(edgeCnt)
@@ -0,0 +1,145 @@
+# times the reorder script's path walk, reorderPaths walking a point to
+# line index against the old reorderPathVerts that swept back and forth
+# over the lines, on polylines that start with a double, in order and
+# shuffled, and checks that both give the same lines,
+# run it with: python tests/bench_path_walk.py [edges ...]
+import sys
+import random
+import time
+
+import mesh_harness
+from bench_path_head import findPathHead
+
+reorder = mesh_harness.loadReorderScript()
+
+# the old walk is only timed on shuffled lines up to this many edges
+oldMaxEdges = 5000
+
+
+# the old path walk, as it was in reorder_vertex_line.py
+def reorderPathVerts(ptsX, ptsY, ptsZ, linesA, linesB, pathHead):
+	linesCnt = len(linesA)
+	roCnt = 0
+	roLinesA = []
+	roLinesB = []
+	usedLines = [0] * linesCnt
+	loc = pathHead
+
+	roLinesA.append(linesA[loc])
+	roLinesB.append(linesB[loc])
+	usedLines[loc] = 1
+	roCnt += 1
+	priorLoc = loc
+	loc += 1
+	foundConnection = 1
+
+	#repeat until all possible connections are found
+	while (foundConnection):
+
+		#reset
+		foundConnection = 0
+
+		if loc == -1:
+			loc += 2
+
+		#move location forwards and find connected lines
+		while loc < linesCnt:
+			if usedLines[loc] != 1:
+				if (linesA[loc] == linesA[priorLoc]) or (linesB[loc] == linesB[priorLoc]) or (linesA[loc] == linesB[priorLoc]) or (linesB[loc] == linesA[priorLoc]):
+					roLinesA.append(linesA[loc])
+					roLinesB.append(linesB[loc])
+					usedLines[loc] = 1
+					roCnt += 1
+					priorLoc = loc
+					foundConnection = 1
+
+			loc += 1
+
+		if loc == linesCnt:
+			loc -= 2
+
+		#move location backwards and find connected lines
+		while loc >= 0:
+			if usedLines[loc] != 1:
+				if (linesA[loc] == linesA[priorLoc]) or (linesB[loc] == linesB[priorLoc]) or (linesA[loc] == linesB[priorLoc]) or (linesB[loc] == linesA[priorLoc]):
+					roLinesA.append(linesA[loc])
+					roLinesB.append(linesB[loc])
+					usedLines[loc] = 1
+					roCnt += 1
+					priorLoc = loc
+					foundConnection = 1
+
+			loc -= 1
+
+	#switch line directions if going the wrong way
+	if (linesCnt >= 2):
+		if (roLinesA[0] == roLinesA[1]) or (roLinesA[0] == roLinesB[1]):
+			roLinesA[0], roLinesB[0] = roLinesB[0], roLinesA[0]
+
+	for i in range(1, roCnt):
+		if roLinesA[i] != roLinesB[i-1]:
+			roLinesA[i], roLinesB[i] = roLinesB[i], roLinesA[i]
+
+	return roLinesA, roLinesB
+
+
+# a polyline of edgeCnt lines with a double at its start (the last
+# point), some lines are turned around and the lines may be shuffled
+def getPolyline(edgeCnt, shuffle):
+
+	ptsX = [float(i) for i in range(0, edgeCnt)] + [0.0]
+	ptsY = [random.random() for i in range(0, edgeCnt)]
+	ptsY.append(ptsY[0])
+	ptsZ = [0.0] * (edgeCnt + 1)
+
+	linesA = [edgeCnt] + list(range(0, edgeCnt - 1))
+	linesB = [0] + list(range(1, edgeCnt))
+	for i in range(1, edgeCnt):
+		if random.random() < 0.5:
+			linesA[i], linesB[i] = linesB[i], linesA[i]
+
+	if shuffle:
+		order = list(range(0, edgeCnt))
+		random.shuffle(order)
+		linesA = [linesA[i] for i in order]
+		linesB = [linesB[i] for i in order]
+
+	return ptsX, ptsY, ptsZ, linesA, linesB
+
+
+def runBenchmark(edgeCnt):
+
+	same = 1
+	for name, shuffle in (("ordered", 0), ("shuffled", 1)):
+		ptsX, ptsY, ptsZ, linesA, linesB = getPolyline(edgeCnt, shuffle)
+
+		t = time.time()
+		paths = reorder.reorderPaths(ptsX, ptsY, ptsZ, linesA, linesB)
+		line = "%8d edges %-8s  new %.3fs" % (edgeCnt, name, time.time() - t)
+
+		if not shuffle or edgeCnt <= oldMaxEdges:
+			t = time.time()
+			pathHead = findPathHead(ptsX, ptsY, ptsZ, linesA, linesB)
+			oldLines = reorderPathVerts(ptsX, ptsY, ptsZ, linesA, linesB, pathHead)
+			line += "  old %.3fs" % (time.time() - t)
+
+			if len(paths) != 1 or paths[0][:2] != oldLines:
+				line += "  the lines are not the same"
+				same = 0
+
+		print(line)
+
+	return same
+
+
+if __name__ == "__main__":
+	edgeCnts = [int(a) for a in sys.argv[1:]] or [1000, 5000, 10000, 100000, 1000000]
+
+	random.seed(12)
+	same = 1
+	for edgeCnt in edgeCnts:
+		if not runBenchmark(edgeCnt):
+			same = 0
+
+	if not same:
+		sys.exit(1)
@@ -0,0 +1,153 @@
+# times the reorder script's point spatial hash, building the grid, finding
+# the points within doubleLimit of a point (findGridPts) and the nearest
+# point (findNearestGridPt), checks the queries against a brute force
+# search and joins polylines that were split with jittered ends,
+# run it with: python tests/bench_point_grid.py [points ...]
+import sys
+import math
+import random
+import time
+
+import mesh_harness
+
+reorder = mesh_harness.loadReorderScript()
+
+# number of timed queries of each kind
+withinQueries = 50000
+nearestQueries = 20000
+
+
+def getSquaredDist(ptsX, ptsY, ptsZ, i, x, y, z):
+	return (ptsX[i] - x) ** 2 + (ptsY[i] - y) ** 2 + (ptsZ[i] - z) ** 2
+
+
+# compare the queries with a brute force search on small random point
+# sets, some of them flat and queried from outside of the grid
+def checkQueries(trials):
+
+	for trial in range(0, trials):
+		ptCnt = random.randint(1, 200)
+		ptsX = [random.uniform(-5.0, 5.0) for i in range(0, ptCnt)]
+		ptsY = [random.uniform(-5.0, 5.0) for i in range(0, ptCnt)]
+		if trial % 3 == 0:
+			ptsZ = [0.0] * ptCnt
+		else:
+			ptsZ = [random.uniform(-1.0, 1.0) for i in range(0, ptCnt)]
+		ids = list(range(0, ptCnt))
+
+		grid = reorder.buildPointGrid(ptsX, ptsY, ptsZ, ids, reorder.getGridCellSize(ptsX, ptsY, ptsZ, ids))
+		x, y, z = random.uniform(-20.0, 20.0), random.uniform(-20.0, 20.0), random.uniform(-3.0, 3.0)
+		nearest = reorder.findNearestGridPt(grid, ptsX, ptsY, ptsZ, x, y, z)
+		best = min(ids, key=lambda i: getSquaredDist(ptsX, ptsY, ptsZ, i, x, y, z))
+		if getSquaredDist(ptsX, ptsY, ptsZ, nearest, x, y, z) != getSquaredDist(ptsX, ptsY, ptsZ, best, x, y, z):
+			return 0
+
+		limit = 0.5
+		grid = reorder.buildPointGrid(ptsX, ptsY, ptsZ, ids, limit)
+		i = random.choice(ids)
+		found = reorder.findGridPts(grid, ptsX, ptsY, ptsZ, ptsX[i], ptsY[i], ptsZ[i], limit)
+		within = [n for n in ids if getSquaredDist(ptsX, ptsY, ptsZ, n, ptsX[i], ptsY[i], ptsZ[i]) <= limit * limit]
+		if sorted(found) != within:
+			return 0
+
+	return 1
+
+
+def runBenchmark(ptCnt):
+
+	ptsX = [random.uniform(0.0, 1000.0) for i in range(0, ptCnt)]
+	ptsY = [random.uniform(0.0, 1000.0) for i in range(0, ptCnt)]
+	ptsZ = [random.uniform(0.0, 10.0) for i in range(0, ptCnt)]
+	ids = list(range(0, ptCnt))
+	limit = reorder.doubleLimit
+
+	# cells doubleLimit wide, like weldLineEnds uses
+	t = time.time()
+	grid = reorder.buildPointGrid(ptsX, ptsY, ptsZ, ids, limit)
+	withinBuild = time.time() - t
+
+	queries = [random.randrange(0, ptCnt) for k in range(0, withinQueries)]
+	t = time.time()
+	for i in queries:
+		reorder.findGridPts(grid, ptsX, ptsY, ptsZ, ptsX[i], ptsY[i], ptsZ[i], limit)
+	withinTime = (time.time() - t) / withinQueries
+
+	# cells for about one point each, like the nearest start mode uses
+	t = time.time()
+	grid = reorder.buildPointGrid(ptsX, ptsY, ptsZ, ids, reorder.getGridCellSize(ptsX, ptsY, ptsZ, ids))
+	nearestBuild = time.time() - t
+
+	queries = [(random.uniform(0.0, 1000.0), random.uniform(0.0, 1000.0), random.uniform(0.0, 10.0))
+	           for k in range(0, nearestQueries)]
+	t = time.time()
+	for x, y, z in queries:
+		reorder.findNearestGridPt(grid, ptsX, ptsY, ptsZ, x, y, z)
+	nearestTime = (time.time() - t) / nearestQueries
+
+	print("%8d points  build %.2fs  within limit %5.1fus  build (density) %.2fs  nearest %5.1fus" % (
+	      ptCnt, withinBuild, withinTime * 1e6, nearestBuild, nearestTime * 1e6))
+
+
+# polylines split into pieces every pieceEdges lines, each piece
+# starting at a copy of the last one's end moved by up to jitter,
+# the lines are shuffled
+def getSplitPolylines(chainCnt, edgeCnt, pieceEdges, jitter):
+
+	ptsX = []
+	ptsY = []
+	ptsZ = []
+	linesA = []
+	linesB = []
+	for c in range(0, chainCnt):
+		prior = None
+		for i in range(0, edgeCnt + 1):
+			x, y = c * 10.0 + math.cos(i * 0.01), math.sin(i * 0.01)
+			pt = len(ptsX)
+			ptsX.append(x)
+			ptsY.append(y)
+			ptsZ.append(0.0)
+			if prior != None:
+				linesA.append(prior)
+				linesB.append(pt)
+
+			prior = pt
+			if i % pieceEdges == 0 and 0 < i < edgeCnt:
+				prior = len(ptsX)
+				ptsX.append(x + random.uniform(-jitter, jitter))
+				ptsY.append(y + random.uniform(-jitter, jitter))
+				ptsZ.append(random.uniform(-jitter, jitter))
+
+	order = list(range(0, len(linesA)))
+	random.shuffle(order)
+
+	return ptsX, ptsY, ptsZ, [linesA[i] for i in order], [linesB[i] for i in order]
+
+
+def runWeldBenchmark(chainCnt, edgeCnt, pieceEdges):
+
+	ptsX, ptsY, ptsZ, linesA, linesB = getSplitPolylines(chainCnt, edgeCnt, pieceEdges, 1e-9)
+
+	t = time.time()
+	paths = reorder.reorderPaths(ptsX, ptsY, ptsZ, linesA, linesB)
+	print("%d lines split every %d lines, %d points -> %d paths  %.2fs" % (
+	      len(linesA), pieceEdges, len(ptsX), len(paths), time.time() - t))
+
+	return len(paths) == chainCnt
+
+
+if __name__ == "__main__":
+	ptCnts = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+
+	random.seed(14)
+	passed = checkQueries(300)
+	print("queries match a brute force search: %s" % (bool(passed)))
+
+	for ptCnt in ptCnts:
+		runBenchmark(ptCnt)
+
+	for chainCnt, edgeCnt, pieceEdges in ((10, 1000, 100), (100, 10000, 10)):
+		if not runWeldBenchmark(chainCnt, edgeCnt, pieceEdges):
+			passed = 0
+
+	if not passed:
+		sys.exit(1)
@@ -0,0 +1,119 @@
+# times the exporter's path simplifying (simplifyPts) on long synthetic
+# chains, with numpy and without, printing how many points are left and
+# the largest distance of a removed point from the simplified path,
+# run it with: python tests/bench_simplify.py [points ...]
+import sys
+import os
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import simple_ngc_export
+
+# the chord tolerance
+tol = 0.001
+
+
+# long straight runs with a little jitter, like a densely cut polyline
+def getStraightRuns(ptCnt):
+
+	xPts = []
+	yPts = []
+	x = y = ang = 0.0
+	for i in range(0, ptCnt):
+		if i % 5000 == 0:
+			ang = random.uniform(0.0, 2.0 * math.pi)
+		x += math.cos(ang) * 0.01
+		y += math.sin(ang) * 0.01
+		xPts.append(x + random.uniform(-1e-5, 1e-5))
+		yPts.append(y + random.uniform(-1e-5, 1e-5))
+
+	return xPts, yPts, [0.0] * ptCnt
+
+
+# a densely cut spiral, like a converted curve
+def getSpiral(ptCnt):
+
+	xPts = [math.cos(i * 1e-4) * (50.0 + i * 1e-5) for i in range(0, ptCnt)]
+	yPts = [math.sin(i * 1e-4) * (50.0 + i * 1e-5) for i in range(0, ptCnt)]
+
+	return xPts, yPts, [0.0] * ptCnt
+
+
+# the distance of a point from the line between two points
+def getLineDist(pt, a, b):
+
+	d = [b[k] - a[k] for k in range(0, 3)]
+	p = [pt[k] - a[k] for k in range(0, 3)]
+	lineLen = d[0]*d[0] + d[1]*d[1] + d[2]*d[2]
+
+	t = 0.0
+	if lineLen > 0.0:
+		t = min(1.0, max(0.0, (p[0]*d[0] + p[1]*d[1] + p[2]*d[2]) / lineLen))
+
+	return math.sqrt(sum([(p[k] - t*d[k]) ** 2 for k in range(0, 3)]))
+
+
+# the largest distance of a point from the simplified path, the kept
+# points are found in the original points in order
+def getLargestDist(xPts, yPts, zPts, keptPts):
+
+	pts = list(zip(xPts, yPts, zPts))
+	kept = list(zip(keptPts[0], keptPts[1], keptPts[2]))
+
+	largest = 0.0
+	k = 0
+	for pt in pts:
+		if k + 1 < len(kept) and pt == kept[k + 1]:
+			k += 1
+			continue
+		if pt != kept[k]:
+			largest = max(largest, getLineDist(pt, kept[k], kept[k + 1]))
+
+	return largest
+
+
+def runBenchmark(ptCnt):
+
+	for name, getChain in (("straight runs", getStraightRuns), ("dense spiral", getSpiral)):
+		xPts, yPts, zPts = getChain(ptCnt)
+
+		for useNumpy in (1, 0):
+			if useNumpy and not simple_ngc_export.haveNumpy():
+				continue
+
+			# numpy is only used for more than numpyMinPts points
+			savedMinPts = simple_ngc_export.numpyMinPts
+			if not useNumpy:
+				simple_ngc_export.numpyMinPts = ptCnt + 1
+			try:
+				t = time.time()
+				keptPts = simple_ngc_export.simplifyPts(xPts, yPts, zPts, tol)
+				seconds = time.time() - t
+			finally:
+				simple_ngc_export.numpyMinPts = savedMinPts
+
+			print("%-13s %d -> %d points (%.2f%%)  %-6s %.2fs" % (name, ptCnt, len(keptPts[0]),
+			      100.0 * len(keptPts[0]) / ptCnt, ["python", "numpy"][useNumpy], seconds))
+
+		largest = getLargestDist(xPts, yPts, zPts, keptPts)
+		print("  largest distance from the simplified path %.6f (tol %g)" % (largest, tol))
+		if largest > tol:
+			return 0
+
+	return 1
+
+
+if __name__ == "__main__":
+	ptCnts = [int(a) for a in sys.argv[1:]] or [1000000]
+
+	random.seed(3)
+	withinTol = 1
+	for ptCnt in ptCnts:
+		if not runBenchmark(ptCnt):
+			withinTol = 0
+
+	if not withinTol:
+		sys.exit(1)
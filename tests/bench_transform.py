@@ -0,0 +1,138 @@
+# times the exporter's object transform, one matrix for each object
+# (getTransMatrix and transformPts) against the old applyTrans that turned
+# every point with three degRot calls, and checks that the points match,
+# run it with: python tests/bench_transform.py [points ...]
+import sys
+import os
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import simple_ngc_export
+
+# largest difference allowed between the old and new points
+matchTol = 1e-9
+
+
+# the old per point transform, as it was in simple_ngc_export.py
+def degRot(horiP, vertP, degrees):
+
+	hUc = math.cos(degrees * (math.pi * 2.0 / 360.0))
+	vUc = math.sin(degrees * (math.pi * 2.0 / 360.0))
+
+	hLine1 = hUc
+	vLine1 = vUc
+	hLine2 = -vUc
+	vLine2 = hUc
+
+	h = vertP * hLine2 + horiP * vLine2
+	v = horiP * vLine1 + vertP * hLine1
+	horiP = h
+	vertP = v
+
+	return (horiP, vertP)
+
+
+def applyTrans(x, y, z, meshData):
+
+	# apply object size
+	x *= meshData.size[0]
+	y *= meshData.size[1]
+	z *= meshData.size[2]
+
+	# apply object x axis rotation
+	vertsRot = degRot(y, z, meshData.rot[0] / (math.pi * 2.0 / 360.0))
+	y = vertsRot[0]
+	z = vertsRot[1]
+
+	# apply object y axis rotation
+	vertsRot = degRot(x, z, -meshData.rot[1] / (math.pi * 2.0 / 360.0))
+	x = vertsRot[0]
+	z = vertsRot[1]
+
+	# apply object z axis rotation
+	vertsRot = degRot(x, y, meshData.rot[2] / (math.pi * 2.0 / 360.0))
+	x = vertsRot[0]
+	y = vertsRot[1]
+
+	# apply object location
+	x += meshData.loc[0]
+	y += meshData.loc[1]
+	z += meshData.loc[2]
+
+	return (x, y, z)
+
+
+# the object settings applyTrans reads
+class MeshData:
+	def __init__(self, size, rot, loc):
+		self.size = size
+		self.rot = rot
+		self.loc = loc
+
+
+# random points and an object turned on all three axes
+def getTestObject(ptCnt):
+
+	xPts = [random.uniform(-100.0, 100.0) for i in range(0, ptCnt)]
+	yPts = [random.uniform(-100.0, 100.0) for i in range(0, ptCnt)]
+	zPts = [random.uniform(-10.0, 10.0) for i in range(0, ptCnt)]
+	meshData = MeshData((1.5, 2.0, 0.5), (0.3, -0.2, 1.1), (12.0, -3.5, 1.25))
+
+	return xPts, yPts, zPts, meshData
+
+
+def runBenchmark(ptCnt):
+
+	xPts, yPts, zPts, meshData = getTestObject(ptCnt)
+
+	t = time.time()
+	oldPts = [applyTrans(x, y, z, meshData) for x, y, z in zip(xPts, yPts, zPts)]
+	oldTime = time.time() - t
+	print("%d points, applyTrans %.3fs" % (ptCnt, oldTime))
+
+	worst = 0.0
+	for name, minPts in (("numpy", simple_ngc_export.numpyMinPts), ("pure python", ptCnt + 1)):
+		if name == "numpy" and not simple_ngc_export.haveNumpy():
+			continue
+
+		# transformPts only uses numpy for at least numpyMinPts points
+		savedMinPts = simple_ngc_export.numpyMinPts
+		simple_ngc_export.numpyMinPts = minPts
+		try:
+			t = time.time()
+			matrix = simple_ngc_export.getTransMatrix(meshData.size, meshData.rot, meshData.loc)
+			newPts = simple_ngc_export.transformPts(xPts, yPts, zPts, matrix)
+			newTime = time.time() - t
+		finally:
+			simple_ngc_export.numpyMinPts = savedMinPts
+
+		# the largest difference and the coordinates that don't print the same
+		diff = 0.0
+		printDiffs = 0
+		for oldPt, x, y, z in zip(oldPts, newPts[0], newPts[1], newPts[2]):
+			diff = max(diff, abs(oldPt[0] - x), abs(oldPt[1] - y), abs(oldPt[2] - z))
+			if "%f %f %f" % oldPt != "%f %f %f" % (x, y, z):
+				printDiffs += 1
+		worst = max(worst, diff)
+
+		print("  %-11s %.3fs (%.1fx)  largest difference %.1e, %d points print differently with %%f" % (
+		      name, newTime, oldTime / max(newTime, 1e-9), diff, printDiffs))
+
+	return worst <= matchTol
+
+
+if __name__ == "__main__":
+	ptCnts = [int(a) for a in sys.argv[1:]] or [20000, 200000]
+
+	random.seed(1)
+	matched = 1
+	for ptCnt in ptCnts:
+		if not runBenchmark(ptCnt):
+			matched = 0
+
+	if not matched:
+		print("The points differ by more than %g" % (matchTol))
+		sys.exit(1)
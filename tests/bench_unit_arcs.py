@@ -0,0 +1,117 @@
+# times the curve script's shared unit arc tables, getArcPts turning and
+# scaling a table against the old getArcPts that found the sin and cos of
+# every point, on many arcs and spirals with the usual cut counts, prints
+# the table hits and misses and checks that both give the same points,
+# run it with: python tests/bench_unit_arcs.py [arcs]
+import sys
+import os
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import create_circ_curve
+
+# the largest difference allowed between the old and new points
+matchTol = 1e-9
+
+
+# the old curve points, as getArcPts made them before the unit arc tables
+def getArcPtsOld(deg1, deg2, rad1, rad2, pts):
+
+	pts = int(pts)
+	if pts < 2:
+		return [], []
+
+	edges = list(zip(range(0, pts-1), range(1, pts)))
+
+	if pts >= create_circ_curve.numpyMinPts and create_circ_curve.haveNumpy():
+		numpy = create_circ_curve.numpy
+		t = numpy.arange(pts) / (pts-1.0)
+		deg = deg1 * (1.0 - t) + deg2 * t
+		rad = rad1 * (1.0 - t) + rad2 * t
+
+		ang = numpy.radians(deg)
+		xPts = (numpy.sin(ang) * rad).tolist()
+		yPts = (numpy.cos(ang) * rad).tolist()
+
+		return list(zip(xPts, yPts, [0.0] * pts)), edges
+
+	verts = []
+	for i in range(0, pts):
+		t = i / (pts-1.0)
+		ang = math.radians(deg1 * (1.0 - t) + deg2 * t)
+		rad = rad1 * (1.0 - t) + rad2 * t
+
+		verts.append((math.sin(ang) * rad, math.cos(ang) * rad, 0.0))
+
+	return verts, edges
+
+
+# arcs at random start angles and radii, every fourth one a spiral,
+# with 8 to 64 cuts per 90 degrees and the usual sweeps
+def getArcs(arcCnt):
+
+	arcs = []
+	for i in range(0, arcCnt):
+		deg1 = random.uniform(-180.0, 180.0)
+		deg2 = deg1 + random.choice((90.0, 180.0, 270.0, 360.0, -90.0))
+		rad1 = random.uniform(0.5, 100.0)
+		rad2 = rad1
+		if i % 4 == 0:
+			rad2 = rad1 * random.uniform(0.5, 2.0)
+
+		cuts = random.choice((8, 16, 32, 64))
+		arcs.append((deg1, deg2, rad1, rad2, create_circ_curve.getCurvePtCnt(deg1, deg2, rad1, rad2, cuts)))
+
+	return arcs
+
+
+def runBenchmark(arcCnt):
+
+	arcs = getArcs(arcCnt)
+
+	# import numpy before the old points are timed
+	create_circ_curve.haveNumpy()
+
+	t = time.time()
+	oldPts = [getArcPtsOld(*arc)[0] for arc in arcs]
+	oldTime = time.time() - t
+
+	create_circ_curve.unitArcs.clear()
+	create_circ_curve.unitArcHits = 0
+	create_circ_curve.unitArcMisses = 0
+
+	t = time.time()
+	newPts = [create_circ_curve.getArcPts(*arc)[0] for arc in arcs]
+	newTime = time.time() - t
+
+	hits = create_circ_curve.unitArcHits
+	misses = create_circ_curve.unitArcMisses
+	print("%d arcs  old %.2fs  tables %.2fs  table hits %d, misses %d (%.2f%% hits), %d tables" % (
+	      arcCnt, oldTime, newTime, hits, misses, 100.0 * hits / max(hits + misses, 1),
+	      len(create_circ_curve.unitArcs)))
+
+	largest = 0.0
+	for oldVerts, newVerts in zip(oldPts, newPts):
+		if len(oldVerts) != len(newVerts):
+			largest = float("inf")
+			break
+
+		for a, b in zip(oldVerts, newVerts):
+			largest = max(largest, abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+	print("  largest point difference %.1e (tol %g)" % (largest, matchTol))
+
+	return largest <= matchTol
+
+
+if __name__ == "__main__":
+	arcCnt = 100000
+	if len(sys.argv) > 1:
+		arcCnt = int(sys.argv[1])
+
+	random.seed(23)
+	if not runBenchmark(arcCnt):
+		sys.exit(1)
@@ -0,0 +1,170 @@
+# times the g-code writer on long synthetic paths, printing lines and
+# bytes each second, the old writer that formatted and wrote every line
+# on its own against formatPathBody's batches written in large chunks,
+# and the old export of a mesh against writeGcode (plain and gzip
+# compressed), checks that both write the same file, run it with:
+# python tests/bench_writer.py [segments ...]
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import simple_ngc_export
+from bench_transform import MeshData, applyTrans
+
+
+# the old writer, one % operation and one write call for each line
+def writeOldLines(xPts, yPts, zPts, file_name):
+
+	file = open(file_name, "w")
+	for i in range(0, len(xPts)):
+		file.write("G1 X%f Y%f Z%f\n" % (xPts[i], yPts[i], zPts[i]))
+	file.close()
+
+
+# the new writer, batches of lines from formatPathBody written in large chunks
+def writeNewLines(xPts, yPts, zPts, file_name, opts):
+
+	file = simple_ngc_export.openGcodeFile(file_name, 0)
+	chunk = []
+	chunkLen = 0
+	for text in simple_ngc_export.formatPathBody(xPts, yPts, zPts, opts):
+		chunk.append(text)
+		chunkLen += len(text)
+		if chunkLen >= simple_ngc_export.writeChunkSize:
+			simple_ngc_export.writeChunk(file, chunk)
+			chunk = []
+			chunkLen = 0
+	simple_ngc_export.writeChunk(file, chunk)
+	file.close()
+
+
+# the old export of a mesh, the way ExportToGcode wrote it
+# before (without the G0 positioning code)
+def writeOldGcode(record, file_name, feedRate):
+
+	coords = record['coords']
+	edges = record['edges']
+	meshData = MeshData(record['size'], record['rot'], record['loc'])
+
+	file = open(file_name, "w")
+	file.write("G90\n")
+	file.write("\n")
+
+	file.write("( %s )\n" % (record['name']))
+
+	i = edges[0] * 3
+	x, y, z = applyTrans(coords[i], coords[i+1], coords[i+2], meshData)
+	file.write("G1 F%f X%f Y%f Z%f\n" % (feedRate, x, y, z))
+
+	for k in range(1, len(edges), 2):
+		i = edges[k] * 3
+		x, y, z = applyTrans(coords[i], coords[i+1], coords[i+2], meshData)
+		file.write("G1 X%f Y%f Z%f\n" % (x, y, z))
+
+	file.write("\n")
+	file.write("M2\n")
+	file.close()
+
+
+# a mesh record of a random walk with a number of segments, the
+# buffers are filled directly since makeMeshRecord needs vertex lists
+def getTestRecord(segCnt):
+
+	coords = array('d')
+	x = y = z = 0.0
+	for i in range(0, segCnt + 1):
+		ang = random.uniform(0.0, 2.0 * math.pi)
+		x += math.cos(ang)
+		y += math.sin(ang)
+		z = random.uniform(-1.0, 0.0)
+		coords.extend((x, y, z))
+
+	edges = array('i')
+	for i in range(0, segCnt):
+		edges.extend((i, i + 1))
+
+	return {'name': "path", 'coords': coords, 'edges': edges, 'size': (1.0, 1.0, 1.0),
+	        'rot': (0.0, 0.0, 0.0), 'loc': (0.0, 0.0, 0.0), 'layers': 1}
+
+
+def printRate(name, segCnt, seconds, size):
+	print("  %-11s %7.2fs %10.0f lines/s %7.1f MB/s %9.1f MB" % (
+	      name, seconds, segCnt / seconds, size / seconds / 1e6, size / 1e6))
+
+
+def runBenchmark(segCnt, dirName):
+
+	record = getTestRecord(segCnt)
+	opts = simple_ngc_export.getExportOptions()
+	opts.update({'addG0': 0, 'setZero': 0, 'relCoord': 0, 'precision': 6})
+
+	print("%d segments" % (segCnt))
+
+	# formatting and writing only
+	coords = record['coords']
+	xPts = list(coords[0::3])
+	yPts = list(coords[1::3])
+	zPts = list(coords[2::3])
+
+	oldName = os.path.join(dirName, "old.ngc")
+	t = time.time()
+	writeOldLines(xPts, yPts, zPts, oldName)
+	printRate("old lines", segCnt, time.time() - t, os.path.getsize(oldName))
+
+	# formatPathBody leaves out the first point, the path head writes it
+	newName = os.path.join(dirName, "new.ngc")
+	t = time.time()
+	writeNewLines([0.0] + xPts, [0.0] + yPts, [0.0] + zPts, newName, opts)
+	printRate("batches", segCnt, time.time() - t, os.path.getsize(newName))
+
+	same = open(oldName, "rb").read() == open(newName, "rb").read()
+	xPts = yPts = zPts = None
+
+	# the whole export
+	oldName = os.path.join(dirName, "old.ngc")
+	t = time.time()
+	writeOldGcode(record, oldName, opts['feedRate'])
+	printRate("old export", segCnt, time.time() - t, os.path.getsize(oldName))
+
+	newName = os.path.join(dirName, "new.ngc")
+	t = time.time()
+	simple_ngc_export.writeGcode([record], newName, opts)
+	printRate("writeGcode", segCnt, time.time() - t, os.path.getsize(newName))
+
+	opts['gzip'] = 1
+	gzipName = newName + ".gz"
+	t = time.time()
+	simple_ngc_export.writeGcode([record], gzipName, opts)
+	printRate("gzip", segCnt, time.time() - t, os.path.getsize(gzipName))
+
+	same = same and open(oldName, "rb").read() == open(newName, "rb").read()
+	if not same:
+		print("  the files are not the same")
+
+	for name in (oldName, newName, gzipName):
+		os.remove(name)
+
+	return same
+
+
+if __name__ == "__main__":
+	segCnts = [int(a) for a in sys.argv[1:]] or [1000000]
+
+	random.seed(1)
+	dirName = tempfile.mkdtemp()
+	try:
+		same = 1
+		for segCnt in segCnts:
+			if not runBenchmark(segCnt, dirName):
+				same = 0
+	finally:
+		os.rmdir(dirName)
+
+	if not same:
+		sys.exit(1)
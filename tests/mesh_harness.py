@@ -0,0 +1,244 @@
+# runs chgCurveRes and the reorder script over and over against a
+# stand-in for the Blender 2.49 mesh api and counts the meshes that
+# are left without users, run it with: python tests/mesh_harness.py [runs]
+import sys
+import os
+import math
+import types
+
+scriptDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# every mesh made, so the ones without users can be found
+allMeshes = []
+
+
+# stand-in vertices, edges and meshes
+class Vert:
+	def __init__(self, co, index):
+		self.co = list(co)
+		self.index = index
+
+	def __getitem__(self, i):
+		return self.co[i]
+
+
+class Edge:
+	def __init__(self, v1, v2):
+		self.v1 = v1
+		self.v2 = v2
+
+
+class VertSeq(list):
+	def extend(self, pts):
+		for pt in pts:
+			self.append(Vert(pt, len(self)))
+
+
+class EdgeSeq(list):
+	def __init__(self, me):
+		list.__init__(self)
+		self.me = me
+
+	def extend(self, edges):
+		for a, b in edges:
+			self.append(Edge(self.me.verts[a], self.me.verts[b]))
+
+
+class Mesh(object):
+	def __init__(self, name):
+		self.name = name
+		self.users = 0
+		self.properties = {}
+		self.clear()
+		allMeshes.append(self)
+
+	def clear(self):
+		self._verts = VertSeq()
+		self.edges = EdgeSeq(self)
+
+	# setting the vertices to None clears the mesh like Blender does
+	def getVerts(self):
+		return self._verts
+
+	def setVerts(self, verts):
+		if verts != None:
+			raise ValueError("only None can be assigned to verts")
+		self.clear()
+
+	verts = property(getVerts, setVerts)
+
+	def update(self):
+		pass
+
+	def getVertGroupNames(self):
+		return []
+
+
+class Object:
+	def __init__(self, name, verts, edges):
+		self.name = name
+		self.type = "Mesh"
+		self.size = [1.0, 1.0, 1.0]
+		self.properties = {}
+		self.data = Mesh(name)
+		self.data.users = 1
+		self.data.verts.extend(verts)
+		self.data.edges.extend(edges)
+
+	def getData(self, name_only=0, mesh=0):
+		return self.data
+
+	def link(self, me):
+		self.data.users -= 1
+		me.users += 1
+		self.data = me
+
+
+class Objects(list):
+	active = None
+	selected = []
+
+
+class SceneData:
+	def __init__(self, obs):
+		self.objects = Objects(obs)
+		self.objects.selected = obs
+		if obs:
+			self.objects.active = obs[0]
+
+
+# load a script as a module, the reorder script does its work when it is loaded
+def loadScript(name):
+	path = os.path.join(scriptDir, name + ".py")
+	try:
+		import importlib.util
+	except ImportError:
+		import imp
+		return imp.load_source(name, path)
+
+	spec = importlib.util.spec_from_file_location(name, path)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+
+# the parts of the Blender module the scripts use
+def makeBlenderModule(scene):
+
+	def anything(*args, **kw):
+		return None
+
+	blender = types.ModuleType("Blender")
+
+	editState = [0]
+	def editMode(state=None):
+		if state == None:
+			return editState[0]
+		editState[0] = state
+
+	blender.Window = types.ModuleType("Blender.Window")
+	blender.Window.EditMode = editMode
+	blender.Window.RedrawAll = anything
+	blender.Window.DrawProgressBar = anything
+
+	# the reorder menu starts paths at the end with the lowest index
+	blender.Draw = types.ModuleType("Blender.Draw")
+	blender.Draw.PupMenu = lambda *args: 1
+	blender.Draw.Register = anything
+
+	blender.Scene = types.ModuleType("Blender.Scene")
+	blender.Scene.GetCurrent = lambda: scene
+
+	blender.__all__ = ["Window", "Draw", "Scene"]
+
+	bpy = types.ModuleType("bpy")
+	bpy.data = types.ModuleType("bpy.data")
+	bpy.data.meshes = types.ModuleType("bpy.data.meshes")
+	bpy.data.meshes.new = Mesh
+
+	return blender, bpy
+
+
+# load the reorder script to use its functions, it
+# has nothing to reorder in an empty scene
+def loadReorderScript():
+
+	blender, bpy = makeBlenderModule(SceneData([]))
+	sys.modules["Blender"] = blender
+	sys.modules["bpy"] = bpy
+
+	return loadScript("reorder_vertex_line")
+
+
+# the bytes the stand-in meshes hold, measured with sys.getsizeof over
+# the meshes, their vertex and edge lists, vertices, edges and coordinates
+def getMeshBytes(meshes):
+
+	seen = {}
+	size = 0
+	objs = list(meshes)
+	while objs:
+		obj = objs.pop()
+		if id(obj) in seen:
+			continue
+		seen[id(obj)] = 1
+		size += sys.getsizeof(obj)
+
+		if isinstance(obj, Mesh):
+			objs.extend([obj.__dict__, obj._verts, obj.edges, obj.properties])
+		elif isinstance(obj, (Vert, Edge)):
+			objs.append(obj.__dict__)
+		elif isinstance(obj, dict):
+			objs.extend(obj.values())
+		elif isinstance(obj, list):
+			objs.extend(obj)
+
+	return size
+
+
+# the points and edges of a quarter circle
+def getArc(rad, ptCnt=40):
+	verts = []
+	for i in range(0, ptCnt):
+		deg = 90.0 * i / (ptCnt - 1)
+		verts.append((math.sin(math.radians(deg)) * rad, math.cos(math.radians(deg)) * rad, 0.0))
+
+	edges = []
+	for i in range(0, ptCnt - 1):
+		edges.append((i, i + 1))
+
+	return verts, edges
+
+
+def runScripts(runs):
+
+	obs = []
+	for n in range(0, 10):
+		verts, edges = getArc(2.0 + n)
+		obs.append(Object("curve%d" % n, verts, edges))
+
+	blender, bpy = makeBlenderModule(SceneData(obs))
+	sys.modules["Blender"] = blender
+	sys.modules["bpy"] = bpy
+
+	circCurve = loadScript("create_circ_curve")
+	for run in range(0, runs):
+		circCurve.chgCurveRes(float(4 + run % 5))
+
+	for run in range(0, runs):
+		loadScript("reorder_vertex_line")
+
+	orphans = [me for me in allMeshes if me.users == 0]
+	print("%d runs: %d meshes, %d orphans holding %d bytes (sys.getsizeof)" % (
+	      runs, len(allMeshes), len(orphans), getMeshBytes(orphans)))
+
+	return len(orphans)
+
+
+if __name__ == "__main__":
+	runs = 20
+	if len(sys.argv) > 1:
+		runs = int(sys.argv[1])
+
+	if runScripts(runs):
+		sys.exit(1)
@@ -0,0 +1,121 @@
+# arc fitting in the g-code exporter, on the points of curves made
+# the way create_circ_curve.py's createCurve makes them
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import create_circ_curve
+import simple_ngc_export
+
+
+# the points of a curve from createCurve's parameters
+def getCurvePts(deg1, deg2, rad1, rad2, cuts):
+	
+	pts = create_circ_curve.getCurvePtCnt(deg1, deg2, rad1, rad2, cuts)
+	verts, edges = create_circ_curve.getArcPts(deg1, deg2, rad1, rad2, pts)
+	
+	return [v[0] for v in verts], [v[1] for v in verts], [v[2] for v in verts]
+
+
+# the export options with arcs on
+def getArcOpts(tol, relCoord=0):
+	
+	opts = simple_ngc_export.getExportOptions()
+	opts.update({'arcs': 1, 'arcTol': tol, 'relCoord': relCoord, 'modal': 0, 'simplify': 0})
+	
+	return opts
+
+
+# fit and format a path, returns the lines of its body
+def formatCurve(xPts, yPts, zPts, opts):
+	
+	xPts, yPts, zPts, arcs = simple_ngc_export.fitPath(xPts, yPts, zPts, opts)
+	body = ''.join(simple_ngc_export.formatPathBody(xPts, yPts, zPts, opts, arcs))
+	
+	return body.splitlines()
+
+
+# get the words of a line as a dict of floats
+def getWords(line):
+	
+	words = {}
+	for word in line.split()[1:]:
+		words[word[0]] = float(word[1:])
+	
+	return words
+
+
+class ArcFittingTest(unittest.TestCase):
+	
+	# the curves looked at, (deg1, deg2, rad1, rad2)
+	curves = [(0.0, 90.0, 1.0, 1.0), (30.0, 389.0, 2.0, 2.0), (0.0, -690.0, 1.5, 1.5),
+	          (0.0, 90.0, 50.0, 50.0)]
+	
+	def testLineCounts(self):
+		
+		for deg1, deg2, rad1, rad2 in self.curves:
+			for cuts in (8, 32, 128, 512):
+				xPts, yPts, zPts = getCurvePts(deg1, deg2, rad1, rad2, cuts)
+				lines = formatCurve(xPts, yPts, zPts, getArcOpts(0.001))
+				arcCnt = len([l for l in lines if l[:2] in ("G2", "G3")])
+				
+				# never more lines than segments, and the dense curves
+				# are only arcs, one for each full circle or less
+				self.assertTrue(len(lines) <= len(xPts) - 1)
+				if cuts >= 128:
+					self.assertEqual(len(lines), arcCnt)
+					self.assertEqual(arcCnt, int(math.ceil(abs(deg2 - deg1) / 360.0)))
+	
+	def testCoarseCurveIsNotFitted(self):
+		
+		# 8 cuts are farther than 0.001 from the true arc
+		xPts, yPts, zPts = getCurvePts(0.0, 90.0, 1.0, 1.0, 8)
+		lines = formatCurve(xPts, yPts, zPts, getArcOpts(0.001))
+		
+		self.assertEqual(len(lines), len(xPts) - 1)
+		self.assertTrue(all([l.startswith("G1") for l in lines]))
+	
+	def testArcEndsAreOnOneCircle(self):
+		
+		for deg1, deg2, rad1, rad2 in self.curves:
+			for cuts in (32, 128, 512):
+				xPts, yPts, zPts = getCurvePts(deg1, deg2, rad1, rad2, cuts)
+				lines = formatCurve(xPts, yPts, zPts, getArcOpts(0.001))
+				
+				x, y = xPts[0], yPts[0]
+				for line in lines:
+					words = getWords(line)
+					if line[:2] in ("G2", "G3"):
+						cx, cy = x + words['I'], y + words['J']
+						startRad = ((x - cx)**2 + (y - cy)**2) ** 0.5
+						endRad = ((words['X'] - cx)**2 + (words['Y'] - cy)**2) ** 0.5
+						self.assertTrue(abs(startRad - endRad) < 1e-5, (deg1, deg2, cuts, line))
+						self.assertTrue(abs(startRad - rad1) < 0.001, (deg1, deg2, cuts, line))
+					x, y = words['X'], words['Y']
+	
+	def testRelativeMatchesAbsolute(self):
+		
+		for cuts in (32, 512):
+			xPts, yPts, zPts = getCurvePts(30.0, 389.0, 2.0, 2.0, cuts)
+			absLines = formatCurve(xPts, yPts, zPts, getArcOpts(0.001))
+			relLines = formatCurve(xPts, yPts, zPts, getArcOpts(0.001, 1))
+			self.assertEqual(len(absLines), len(relLines))
+			
+			x, y = xPts[0], yPts[0]
+			for absLine, relLine in zip(absLines, relLines):
+				self.assertEqual(absLine.split()[0], relLine.split()[0])
+				absWords = getWords(absLine)
+				relWords = getWords(relLine)
+				x += relWords['X']
+				y += relWords['Y']
+				self.assertTrue(abs(x - absWords['X']) < 1e-5 and abs(y - absWords['Y']) < 1e-5)
+				if 'I' in absWords:
+					self.assertEqual((absWords['I'], absWords['J']), (relWords['I'], relWords['J']))
+
+
+if __name__ == '__main__':
+	unittest.main()
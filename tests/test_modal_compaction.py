@@ -0,0 +1,144 @@
+# modal compaction in the g-code exporter, a small scene is exported
+# with compaction on and off and both programs are run through a
+# small interpreter to check that the tool makes the same moves
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simple_ngc_export
+
+
+# the mesh records of a small scene: a flat engraving with axis aligned
+# lines, a 3d path in a turned and scaled object, a circle the arc
+# fitting can find and a path with points on top of each other
+def getScene():
+
+	random.seed(4)
+	records = []
+
+	verts = []
+	for i in range(0, 60):
+		row = i // 10
+		verts.append(((i % 10) * 0.5 * (row % 2) + (9 - i % 10) * 0.5 * (1 - row % 2), row * 0.25, -0.5))
+	records.append(simple_ngc_export.makeMeshRecord("engrave-1", verts, [(i, i + 1) for i in range(0, 59)]))
+
+	verts = [(random.uniform(-5, 5), random.uniform(-5, 5), random.uniform(-1, 0)) for i in range(0, 40)]
+	records.append(simple_ngc_export.makeMeshRecord("path-2", verts, [(i, i + 1) for i in range(0, 39)],
+	               (1.5, 2.0, 0.5), (0.3, -0.2, 1.1), (10.0, -3.0, 1.0)))
+
+	verts = [(math.cos(i * math.pi / 32) * 3.0, math.sin(i * math.pi / 32) * 3.0, -0.25) for i in range(0, 65)]
+	records.append(simple_ngc_export.makeMeshRecord("circle-3", verts, [(i, i + 1) for i in range(0, 64)],
+	               loc=(-8.0, 4.0, 0.0)))
+
+	verts = [(1.0, 1.0, 0.0), (1.0, 1.0, 0.0), (2.0, 1.0, 0.0), (2.0, 1.0, -1.0), (2.0, 1.0, -1.0), (3.0, 2.0, -1.0)]
+	records.append(simple_ngc_export.makeMeshRecord("doubles-4", verts, [(i, i + 1) for i in range(0, 5)]))
+
+	return records
+
+
+# export the scene, returns the program text
+def exportScene(opts):
+
+	return ''.join(simple_ngc_export.genGcode(getScene(), opts))
+
+
+# run a program, returns the moves that go somewhere, each as its
+# motion word, end point, feed rate and arc center offsets
+def getToolMoves(text):
+
+	pos = [0.0, 0.0, 0.0]
+	relative = 0
+	motion = None
+	feed = None
+	moves = []
+
+	for line in text.splitlines():
+		line = line.split('(')[0].strip()
+		if line == "":
+			continue
+
+		words = line.split()
+		if "G92" in words:
+			pos = [0.0, 0.0, 0.0]
+			continue
+
+		end = list(pos)
+		center = None
+		moved = 0
+		for word in words:
+			letter, val = word[0], word[1:]
+			if letter == 'G':
+				if val == "90":
+					relative = 0
+				elif val == "91":
+					relative = 1
+				else:
+					motion = word
+			elif letter == 'F':
+				feed = float(val)
+			elif letter in "XYZ":
+				k = "XYZ".index(letter)
+				if relative:
+					end[k] = pos[k] + float(val)
+				else:
+					end[k] = float(val)
+				moved = 1
+			elif letter in "IJ":
+				center = center or [0.0, 0.0]
+				center["IJ".index(letter)] = float(val)
+
+		# a straight move to where the tool is does nothing,
+		# a whole circle ends where it starts
+		if motion in ("G2", "G3") and center != None:
+			moves.append((motion, tuple(end), feed, tuple(center)))
+		elif moved and end != pos:
+			moves.append((motion, tuple(end), feed, None))
+		pos = end
+
+	return moves
+
+
+class ModalCompactionTest(unittest.TestCase):
+
+	def getOpts(self, relCoord, arcs, precision, modal):
+
+		opts = simple_ngc_export.getExportOptions()
+		opts.update({'relCoord': relCoord, 'arcs': arcs, 'arcTol': 0.01, 'precision': precision,
+		             'modal': modal, 'addG0': 1, 'setZero': 1, 'simplify': 0, 'order': 0,
+		             'repeats': simple_ngc_export.repeatsNone})
+
+		return opts
+
+	def assertSameMoves(self, fullMoves, compactMoves, msg):
+
+		self.assertEqual(len(fullMoves), len(compactMoves), msg)
+		for full, compact in zip(fullMoves, compactMoves):
+			self.assertEqual((full[0], full[2], full[3]), (compact[0], compact[2], compact[3]), msg)
+			for a, b in zip(full[1], compact[1]):
+				self.assertTrue(abs(a - b) < 1e-9, (msg, full, compact))
+
+	def testSameToolMoves(self):
+
+		for relCoord in (0, 1):
+			for arcs in (0, 1):
+				for precision in (3, 6):
+					msg = "relCoord %d, arcs %d, precision %d" % (relCoord, arcs, precision)
+					full = exportScene(self.getOpts(relCoord, arcs, precision, 0))
+					compact = exportScene(self.getOpts(relCoord, arcs, precision, 1))
+
+					fullMoves = getToolMoves(full)
+					self.assertTrue(len(fullMoves) > 100, msg)
+					if (arcs):
+						self.assertTrue([m for m in fullMoves if m[0] in ("G2", "G3")], msg)
+
+					self.assertSameMoves(fullMoves, getToolMoves(compact), msg)
+					self.assertTrue(len(compact) < len(full), msg)
+
+
+if __name__ == '__main__':
+	unittest.main()